@@ -1,18 +1,328 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from datetime import datetime
+from io import BytesIO
+import os
 import time
+from concurrent.futures import BrokenExecutor
+
+from crfill.cache import ParseCache, content_digest, content_key
+from crfill.diff import change_counts, diff_rosters
+from crfill.engine import AUTO_HEADER, DUPLICATE_POLICIES, DayColumnIndex, conflict_report
+from crfill.export import build_report, is_macro_workbook, patch_template
+from crfill.fanout import bundle_zip, fan_out, filled_names, template_stats, unique_names
+from crfill.incremental import FillCache, fill_incremental
+from crfill.jobs import DEFAULT_PARSE_WORKERS, JobLimitError, JobManager
+from crfill.preview import filter_crew, page_count, page_slice, preview_columns, summary_metrics
+from crfill.profiling import RunProfile
+from crfill.reader import (ALL_DAYS, DEFAULT_CACHE_DIR, compact_roster, detect_format, load_roster, process_pool,
+                           read_many, supported_extensions)
+from crfill.store import RosterStore
+from crfill.vocab import DutyVocabulary
 
 st.set_page_config(page_title="Automated CR Filling", layout="wide", initial_sidebar_state="expanded")
 
+OUTPUT_MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "xlsm": "application/vnd.ms-excel.sheet.macroEnabled.12",
+    "zip": "application/zip",
+}
+
 # Initialize session state for additional input files
 if 'additional_files' not in st.session_state:
     st.session_state.additional_files = {}
 
+# Kamus kode tugas bersama: kolom tanggal disimpan sebagai kode, bukan objek string
+if 'duty_vocab' not in st.session_state:
+    st.session_state.duty_vocab = DutyVocabulary()
+
+# Cache hasil parsing file upload (per sesi) agar rerun tidak membaca ulang Excel
+if 'parse_cache' not in st.session_state:
+    st.session_state.parse_cache = ParseCache()
+
+# Hasil fill terakhir per tanggal, dipakai ulang jika template dan input tanggal itu tidak berubah
+if 'fill_cache' not in st.session_state:
+    st.session_state.fill_cache = FillCache()
+
+
+def read_uploaded_excel(uploaded_file, days=None, header=AUTO_HEADER, profile=None, stage="parse"):
+    # Hasil berupa Roster: DataFrame + index Crew ID yang ikut tersimpan di cache
+    # xlsx yang sudah pernah di-parse dibaca dari cache Parquet di disk
+    parsed = []
+    
+    def parse(source, **options):
+        # Diukur saat parsing benar-benar terjadi; record disimpan bersama Roster di cache
+        parse_profile = RunProfile(track_memory=profile is not None and profile.track_memory)
+        with parse_profile.stage(stage) as record:
+            roster = load_roster(source, vocabulary=st.session_state.duty_vocab, cache_dir=DEFAULT_CACHE_DIR,
+                                 **options)
+            record['rows'] = len(roster.df)
+        roster.parse_record = record
+        parsed.append(roster)
+        return roster
+    
+    roster = st.session_state.parse_cache.get_or_parse(
+        uploaded_file.getvalue(),
+        parse,
+        days=days,
+        header=header,
+        fmt=detect_format(uploaded_file)
+    )
+    if profile is not None and roster.parse_record is not None:
+        # Rerun (mis. klik tombol proses) memakai cache; yang dilaporkan tetap biaya parsing aslinya
+        profile.stages.append({**roster.parse_record, 'source': uploaded_file.name, 'cached': not parsed})
+    return roster
+
+
+@st.cache_resource
+def get_job_manager():
+    # Satu worker pool per server: membatasi jumlah proses berat yang berjalan bersamaan
+    return JobManager()
+
+
+@st.cache_resource
+def get_parse_pool():
+    # Pool proses bersama (spawn, bukan fork dari server multi-thread) untuk membaca file per tanggal;
+    # ukurannya membatasi total proses pembaca semua job, bukan per job
+    return process_pool(DEFAULT_PARSE_WORKERS)
+
+
+@st.cache_resource
+def get_roster_store():
+    # Satu file SQLite per server; koneksi dibuka per operasi
+    return RosterStore()
+
+
+def process_roster(job, template_df, template_roster, template_bytes, input_roster, input_name, input_bytes,
+                   date_files, selected_dates, day_index, duplicate_policy, output_mode, apply_formatting,
+                   header, run_profile, parse_cache, fill_cache, duty_vocab, store=None, period=None,
+                   template_name=None, extra_templates=None, previous_df=None, parse_pool=None):
+    # Dijalankan di worker pool (bukan thread script): tidak boleh memanggil st.*, progres lewat job.report()
+    start_time = time.time()
+    run_profile.start()
+    try:
+        job.report(5, "📊 Memulai pemrosesan multi-tanggal...")
+        
+        # Baca semua file input per tanggal sekaligus secara paralel (yang sudah di cache dilewati)
+        date_inputs = {}
+        pending_files = {}
+        for date, (name, data) in date_files.items():
+            cached_roster = parse_cache.get(data, days=ALL_DAYS, header=header, fmt=detect_format(name))
+            if cached_roster is not None:
+                date_inputs[date] = (cached_roster, name, content_digest(data))
+            else:
+                pending_files[date] = data
+        
+        def on_parsed(done, total, date):
+            job.report(5 + int((done / total) * 20), f"📂 Membaca file input per tanggal ({done}/{total})...")
+        
+        with run_profile.stage("parse_per_date", files=len(pending_files)) as record:
+            parsed_frames, load_errors = read_many(pending_files, on_progress=on_parsed, executor=parse_pool,
+                                                   use_processes=False, days=ALL_DAYS, header=header,
+                                                   cache_dir=DEFAULT_CACHE_DIR)
+            record['rows'] = sum(len(df) for df in parsed_frames.values())
+        if any(isinstance(error, BrokenExecutor) for error in load_errors.values()):
+            # Proses anak mati: pool bersama tidak bisa dipakai lagi, job berikutnya memakai pool baru
+            get_parse_pool.clear()
+            if parse_pool is not None:
+                parse_pool.shutdown(wait=False, cancel_futures=True)
+        for date, df in parsed_frames.items():
+            roster = compact_roster(df, duty_vocab)
+            parse_cache.put(content_key(pending_files[date], days=ALL_DAYS, header=header,
+                                        fmt=detect_format(date_files[date][0])), roster)
+            date_inputs[date] = (roster, date_files[date][0], content_digest(pending_files[date]))
+        
+        def on_date(idx, total_dates, date):
+            job.report(25 + int((idx / total_dates) * 55), f"🔄 Memproses tanggal {date} ({idx + 1}/{total_dates})...")
+        
+        run_dates = [date for date in selected_dates if date not in load_errors]
+        default_input = (input_roster, input_name, content_digest(input_bytes))
+        if store is not None:
+            # Masukkan hanya tanggal yang input-nya baru, lalu bentuk roster lengkap periode ini dari store
+            pending_ingest = {}
+            for date in run_dates:
+                roster, name, input_key = date_inputs.get(date, default_input)
+                if not store.is_current(period, date, input_key, duplicate_policy):
+                    pending_ingest.setdefault(input_key, (roster, name, []))[2].append(date)
+            with run_profile.stage("store_ingest", files=len(pending_ingest)) as record:
+                for idx, (input_key, (roster, name, dates)) in enumerate(pending_ingest.items()):
+                    on_date(idx, len(pending_ingest), ", ".join(map(str, dates)))
+                    store.ingest(period, roster, dates, name, input_key, duplicate_policy)
+                record['rows'] = sum(len(dates) for _, _, dates in pending_ingest.values())
+            ingested = {date for _, _, dates in pending_ingest.values() for date in dates}
+            
+            result_df = template_df.copy()
+            overall_stats = store.fill(result_df, period, store.days(period), day_index=day_index,
+                                       template_index=template_roster.crew_index, profile=run_profile)
+            reused_dates = [date for date in overall_stats['date_details'] if date not in ingested]
+        else:
+            # Proses setiap tanggal; tanggal yang input-nya tidak berubah memakai hasil sebelumnya
+            result_df, overall_stats, reused_dates = fill_incremental(
+                fill_cache,
+                template_df,
+                content_digest(template_bytes),
+                run_dates,
+                default_input,
+                date_inputs,
+                day_index=day_index,
+                on_date=on_date,
+                profile=run_profile,
+                template_index=template_roster.crew_index,
+                duplicate_policy=duplicate_policy,
+                vocabulary=duty_vocab
+            )
+        
+        # Laporan Crew ID duplikat dengan nilai berbeda
+        with run_profile.stage("conflict_report") as record:
+            conflict_df = conflict_report(
+                (input_roster, input_name),
+                {date: value[:2] for date, value in date_inputs.items()},
+                [date for date in run_dates if date in overall_stats['date_details']],
+                day_index
+            )
+            record['rows'] = len(conflict_df)
+        
+        # Perubahan per sel dibanding hasil sebelumnya (proses terakhir atau file yang diunggah)
+        diff_df, changes_output = None, None
+        if previous_df is not None:
+            with run_profile.stage("diff", rows=len(result_df)) as record:
+                diff_df = diff_rosters(previous_df, result_df)
+                record['cells'] = len(diff_df)
+        
+        job.report(80, "📝 Membuat file Excel...")
+        
+        def output_extension(name):
+            # Template dengan macro yang ditambal tetap harus bernama .xlsm agar bisa dibuka Excel
+            data = template_bytes if name == template_name else extra_templates[name][0]
+            return "xlsm" if output_mode == "patch" and is_macro_workbook(data) else "xlsx"
+        
+        unpatched_dates = {}
+        if output_mode == "patch":
+            # Tulis langsung ke salinan template asli
+            output, patched_cells, unpatched_dates[template_name] = patch_template(
+                BytesIO(template_bytes),
+                result_df,
+                list(overall_stats['date_details']),
+                day_index,
+                header=header,
+                profile=run_profile
+            )
+        else:
+            # Buat workbook dengan formatting
+            patched_cells = None
+            output = build_report(
+                result_df,
+                apply_formatting=apply_formatting,
+                profile=run_profile,
+                extra_sheets={"Konflik Duplikat": conflict_df} if not conflict_df.empty else None
+            )
+        if diff_df is not None and not diff_df.empty:
+            # Salinan hasil dengan sel yang berubah diwarnai, plus daftar perubahan
+            with run_profile.stage("diff_export", rows=len(diff_df)):
+                changes_output = build_report(
+                    result_df,
+                    apply_formatting=apply_formatting,
+                    extra_sheets={"Perubahan": diff_df},
+                    changes=diff_df
+                ).getvalue()
+        
+        # Template lain memakai input yang sudah diparse & di-index di atas, diisi paralel
+        template_results = {}
+        if extra_templates:
+            def export_template(name, df, stats, index):
+                if output_mode == "patch":
+                    patched, _, unpatched_dates[name] = patch_template(
+                        BytesIO(extra_templates[name][0]), df, list(stats['date_details']), index, header=header)
+                    return patched.getvalue()
+                return build_report(
+                    df,
+                    apply_formatting=apply_formatting,
+                    extra_sheets={"Konflik Duplikat": conflict_df} if not conflict_df.empty else None
+                ).getvalue()
+            
+            def on_template(done, total, name):
+                job.report(85 + int((done / total) * 14), f"🗂️ Mengisi template lain ({done}/{total}): {name}")
+            
+            with run_profile.stage("fan_out", files=len(extra_templates)) as record:
+                template_results = fan_out(
+                    {name: roster for name, (_, roster) in extra_templates.items()},
+                    run_dates,
+                    default_input[:2],
+                    {date: value[:2] for date, value in date_inputs.items()},
+                    duplicate_policy=duplicate_policy,
+                    vocabulary=duty_vocab,
+                    store=store,
+                    period=period,
+                    export=export_template,
+                    on_template=on_template
+                )
+                record['rows'] = sum(len(r['result_df']) for r in template_results.values() if 'error' not in r)
+            
+            files = {template_name: output.getvalue()}
+            files.update({name: r['output'] for name, r in template_results.items() if 'error' not in r})
+            output_names = filled_names(files, output_extension)
+            output = bundle_zip({output_names[name]: data for name, data in files.items()})
+            template_results = {
+                template_name: {'overall_stats': overall_stats, 'missing_dates': day_index.missing(run_dates)},
+                **template_results
+            }
+    finally:
+        run_profile.stop()
+    
+    return {
+        'result_df': result_df,
+        'overall_stats': overall_stats,
+        'reused_dates': reused_dates,
+        'conflict_df': conflict_df,
+        'output': output.getvalue(),
+        'output_kind': "zip" if extra_templates else output_extension(template_name),
+        'template_stats': template_stats(template_results) if template_results else None,
+        'patched_cells': patched_cells,
+        'unpatched_dates': {name: dates for name, dates in unpatched_dates.items() if dates},
+        'diff_df': diff_df,
+        'changes_output': changes_output,
+        'load_errors': load_errors,
+        'run_profile': run_profile,
+        'process_time': time.time() - start_time,
+    }
+
+
+@st.fragment(run_every=0.5)
+def render_job_progress(job):
+    # Polling status job; script utama tidak diblokir dan tetap responsif selama proses berjalan
+    if job.finished:
+        st.rerun()
+    position = get_job_manager().queue_position(job)
+    st.progress(job.progress)
+    st.text(f"⏳ Menunggu giliran di antrian server (posisi {position})..." if position else job.message)
+
+
+@st.fragment
+def render_preview(df, key, selected_dates=None, height=400):
+    # Hanya satu halaman yang dikirim ke browser; filter & paging dijalankan di server
+    col_search, col_size, col_page = st.columns([3, 1, 1])
+    with col_search:
+        query = st.text_input("🔎 Cari Crew ID", key=f"{key}_query")
+    with col_size:
+        page_size = st.selectbox("Baris per halaman", [25, 50, 100, 250], index=1, key=f"{key}_page_size")
+    
+    filtered_df = filter_crew(df, query)
+    n_pages = page_count(len(filtered_df), page_size)
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+    with col_page:
+        page = st.number_input(f"Halaman (dari {n_pages})", min_value=1, max_value=n_pages, key=page_key)
+    
+    columns = list(df.columns)
+    if selected_dates and st.checkbox("Hanya kolom tanggal terpilih", value=True, key=f"{key}_selected_only"):
+        columns = preview_columns(df, selected_dates)
+    
+    page_df, first_row, last_row = page_slice(filtered_df, page, page_size)
+    st.dataframe(page_df[columns], use_container_width=True, height=height)
+    st.caption(f"Menampilkan baris {first_row}-{last_row} dari {len(filtered_df)} ({len(columns)} dari {len(df.columns)} kolom)")
+
+
 # Sidebar untuk informasi dan pengaturan
 with st.sidebar:
     st.image("Logo App.png", use_container_width=True)
@@ -31,8 +341,62 @@ with st.sidebar:
     
     st.divider()
     st.subheader("⚙️ Pengaturan")
-    apply_formatting = st.checkbox("Terapkan Format Excel", value=True, help="Format warna dan style pada hasil Excel")
+    output_mode = st.radio(
+        "Mode Output",
+        options=["report", "patch"],
+        format_func={"report": "Workbook baru", "patch": "Tambal template asli"}.get,
+        help="'Tambal template asli' hanya menulis sel tanggal yang diisi; format, merged cell, formula dan sheet lain di template tetap utuh"
+    )
+    header_row = st.selectbox(
+        "Baris Header", options=[AUTO_HEADER] + list(range(1, 51)),
+        format_func=lambda row: "Otomatis (cari 'Crew ID')" if row == AUTO_HEADER else f"Baris {row}",
+        help="Nomor baris (mulai 1) yang berisi 'Crew ID' dan tanggal pada file xlsx/csv. 'Otomatis' mencarinya per file, "
+             "sehingga template xlsx dengan banner judul bisa dipakai bersama CSV tanpa banner; file Parquet memakai nama kolomnya sendiri"
+    )
+    header = AUTO_HEADER if header_row == AUTO_HEADER else header_row - 1
+    apply_formatting = st.checkbox("Terapkan Format Excel", value=True, help="Format warna dan style pada hasil Excel",
+                                   disabled=output_mode == "patch")
     show_stats = st.checkbox("Tampilkan Statistik", value=True, help="Menampilkan statistik detail hasil pemrosesan")
+    duplicate_policy = st.selectbox(
+        "Crew ID Duplikat di Input",
+        options=list(DUPLICATE_POLICIES),
+        format_func=DUPLICATE_POLICIES.get,
+        help="Baris mana yang dipakai jika satu Crew ID muncul lebih dari sekali di file input"
+    )
+    track_memory = st.checkbox("Lacak Memori per Tahap", value=False, help="Mencatat puncak memori tiap tahap (tracemalloc, proses menjadi lebih lambat)")
+    enable_cprofile = st.checkbox("Aktifkan cProfile", value=False, help="Merekam profil fungsi (cProfile) selama proses data")
+    
+    st.divider()
+    st.subheader("🗄️ Roster Store")
+    use_store = st.checkbox(
+        "Simpan & Isi dari Roster Store", value=False,
+        help="Input yang diproses disimpan per Crew ID & tanggal di SQLite; roster dibentuk dari semua tanggal yang sudah tersimpan untuk periode ini, sehingga setiap hari cukup mengunggah file tanggal baru"
+    )
+    period = st.text_input("Periode Roster", value=datetime.now().strftime("%Y-%m"), disabled=not use_store,
+                           help="Kunci periode di store, mis. 2025-01")
+    
+    st.divider()
+    st.subheader("🔍 Perbandingan Hasil")
+    compare_previous = st.checkbox(
+        "Bandingkan dengan Hasil Sebelumnya", value=True,
+        help="Sel tanggal yang berubah dibanding proses terakhir untuk template yang sama di sesi ini (atau file hasil yang diunggah di bawah) dilaporkan dan diwarnai"
+    )
+    previous_file = st.file_uploader(
+        "File Hasil Sebelumnya (opsional)",
+        type=supported_extensions(),
+        key="previous_result",
+        disabled=not compare_previous,
+        help="Mis. hasil unduhan kemarin; dipakai sebagai pembanding menggantikan proses terakhir. Baris header mengikuti pengaturan di atas"
+    )
+    previous_roster = None
+    if compare_previous and previous_file is not None:
+        try:
+            previous_roster = read_uploaded_excel(previous_file, header=header)
+            if "Crew ID" not in previous_roster.df.columns:
+                st.warning("⚠️ File hasil sebelumnya tidak memiliki kolom 'Crew ID'; perbandingan dilewati")
+                previous_roster = None
+        except Exception as e:
+            st.warning(f"⚠️ File hasil sebelumnya tidak bisa dibaca: {e}")
     
     st.divider()
     st.caption("© 2025 Automated CR Filling")
@@ -47,27 +411,32 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.header("📂 Upload Template")
-    template_file = st.file_uploader(
-        "Upload Template File (.xlsx)", 
-        type=["xlsx"], 
+    template_files = st.file_uploader(
+        "Upload Template File (.xlsx, .csv, .parquet)", 
+        type=supported_extensions(), 
         key="template",
-        help="File template yang akan diisi"
+        accept_multiple_files=True,
+        help="File template yang akan diisi. Unggah beberapa template (mis. per armada/base) untuk mengisi semuanya sekaligus dari input yang sama; hasilnya berupa ZIP"
     )
-    if template_file:
+    # Template pertama dipakai untuk preview & validasi detail; template lain diisi bersamaan
+    template_file = template_files[0] if template_files else None
+    template_names = unique_names([file.name for file in template_files or []])
+    extra_template_files = dict(zip(template_names[1:], (template_files or [])[1:]))
+    for file in template_files or []:
         file_details = {
-            "Nama File": template_file.name,
-            "Ukuran": f"{template_file.size / 1024:.2f} KB",
-            "Tipe": template_file.type
+            "Nama File": file.name,
+            "Ukuran": f"{file.size / 1024:.2f} KB",
+            "Tipe": file.type
         }
-        with st.expander("📄 Detail File Template"):
+        with st.expander(f"📄 Detail File Template: {file.name}" if extra_template_files else "📄 Detail File Template"):
             for key, value in file_details.items():
                 st.text(f"{key}: {value}")
 
 with col2:
     st.header("📥 Upload Input Utama")
     input_file = st.file_uploader(
-        "Upload File Input Utama (.xlsx)", 
-        type=["xlsx"], 
+        "Upload File Input Utama (.xlsx, .csv, .parquet)", 
+        type=supported_extensions(), 
         key="input",
         help="File data yang akan digunakan sebagai default untuk semua tanggal"
     )
@@ -132,7 +501,7 @@ if selected_dates:
                     with col:
                         additional_file = st.file_uploader(
                             f"Tanggal {date}",
-                            type=["xlsx"],
+                            type=supported_extensions(),
                             key=f"additional_file_{date}",
                             help=f"File input khusus untuk tanggal {date}"
                         )
@@ -156,7 +525,12 @@ st.header("🔍 Preview & Validasi Data")
 
 template_df = None
 input_data_df = None
+template_roster = None
+input_roster = None
+day_index = None
+extra_template_rosters = {}
 validation_errors = []
+run_profile = RunProfile(track_memory=track_memory, enable_cprofile=enable_cprofile)
 
 # Tab untuk preview
 tab1, tab2, tab3 = st.tabs(["📑 Template File", "📄 Input Utama", "⚠️ Validasi"])
@@ -164,40 +538,57 @@ tab1, tab2, tab3 = st.tabs(["📑 Template File", "📄 Input Utama", "⚠️ Va
 with tab1:
     if template_file:
         try:
-            template_df = pd.read_excel(template_file, sheet_name=0, header=1)
+            template_roster = read_uploaded_excel(template_file, header=header, profile=run_profile,
+                                                  stage="parse_template")
+            template_df = template_roster.df
+            day_index = DayColumnIndex(template_df.columns)
             
+            metrics = summary_metrics(template_df)
             col_info1, col_info2, col_info3 = st.columns(3)
             with col_info1:
-                st.metric("Total Baris", len(template_df))
+                st.metric("Total Baris", metrics['rows'])
             with col_info2:
-                st.metric("Total Kolom", len(template_df.columns))
+                st.metric("Total Kolom", metrics['columns'])
             with col_info3:
-                if "Crew ID" in template_df.columns:
-                    st.metric("Crew ID Unik", template_df["Crew ID"].nunique())
+                if 'unique_crew' in metrics:
+                    st.metric("Crew ID Unik", metrics['unique_crew'])
             
-            st.dataframe(template_df, use_container_width=True, height=400)
+            render_preview(template_df, "preview_template", selected_dates)
                 
         except Exception as e:
             st.error(f"❌ Gagal membaca file template: {e}")
             validation_errors.append(f"Error template: {e}")
+        
+        if extra_template_files:
+            st.caption(f"🗂️ {len(extra_template_files)} template lain akan diisi bersamaan: {', '.join(extra_template_files)}")
+            for name, file in extra_template_files.items():
+                try:
+                    extra_template_rosters[name] = read_uploaded_excel(file, header=header)
+                except Exception as e:
+                    st.error(f"❌ Gagal membaca template {name}: {e}")
+                    validation_errors.append(f"Error template {name}: {e}")
     else:
         st.info("👆 Silakan upload file template terlebih dahulu")
 
 with tab2:
     if input_file:
         try:
-            input_data_df = pd.read_excel(input_file, sheet_name=0, header=1)
+            input_roster = read_uploaded_excel(input_file, days=ALL_DAYS, header=header, profile=run_profile,
+                                               stage="parse_input")
+            input_data_df = input_roster.df
             
+            metrics = summary_metrics(input_data_df)
             col_info1, col_info2, col_info3 = st.columns(3)
             with col_info1:
-                st.metric("Total Baris", len(input_data_df))
+                st.metric("Total Baris", metrics['rows'])
             with col_info2:
-                st.metric("Total Kolom", len(input_data_df.columns))
+                st.metric("Total Kolom", metrics['columns'])
             with col_info3:
-                if "Crew ID" in input_data_df.columns:
-                    st.metric("Crew ID Unik", input_data_df["Crew ID"].nunique())
+                if 'unique_crew' in metrics:
+                    st.metric("Crew ID Unik", metrics['unique_crew'])
             
-            st.dataframe(input_data_df, use_container_width=True, height=400)
+            st.caption("Hanya kolom 'Crew ID' dan kolom tanggal yang dibaca dari file input")
+            render_preview(input_data_df, "preview_input", selected_dates)
                 
         except Exception as e:
             st.error(f"❌ Gagal membaca file input: {e}")
@@ -207,28 +598,36 @@ with tab2:
 
 with tab3:
     if template_df is not None and input_data_df is not None:
-        # Validasi kolom
-        if "Crew ID" not in template_df.columns:
-            validation_errors.append("❌ Template tidak memiliki kolom 'Crew ID'")
-        if "Crew ID" not in input_data_df.columns:
-            validation_errors.append("❌ Input tidak memiliki kolom 'Crew ID'")
-        
-        # Validasi tanggal yang dipilih
-        if not selected_dates:
-            validation_errors.append("❌ Belum ada tanggal yang dipilih untuk diproses")
-        else:
-            missing_date_cols = []
-            for date in selected_dates:
-                date_col = None
-                for col in template_df.columns:
-                    if str(date) in str(col):
-                        date_col = col
-                        break
-                if date_col is None:
-                    missing_date_cols.append(date)
+        with run_profile.stage("validation", rows=len(template_df) + len(input_data_df)):
+            # Validasi kolom
+            if "Crew ID" not in template_df.columns:
+                validation_errors.append("❌ Template tidak memiliki kolom 'Crew ID'")
+            if "Crew ID" not in input_data_df.columns:
+                validation_errors.append("❌ Input tidak memiliki kolom 'Crew ID'")
+            if use_store and not period.strip():
+                validation_errors.append("❌ Periode Roster wajib diisi jika Roster Store dipakai")
+            if output_mode == "patch" and any(detect_format(file) != "xlsx" for file in template_files):
+                validation_errors.append("❌ Mode 'Tambal template asli' membutuhkan template .xlsx")
+            for name, roster in extra_template_rosters.items():
+                if "Crew ID" not in roster.df.columns:
+                    validation_errors.append(f"❌ Template {name} tidak memiliki kolom 'Crew ID'")
+                    continue
+                missing = DayColumnIndex(roster.df.columns).missing(selected_dates or [])
+                if missing:
+                    st.warning(f"⚠️ Template {name} tidak memiliki kolom tanggal {', '.join(map(str, missing))}; tanggal tersebut dilewati untuk template ini")
             
-            if missing_date_cols:
-                validation_errors.append(f"❌ Kolom tanggal tidak ditemukan di template untuk: {', '.join(map(str, missing_date_cols))}")
+            # Validasi tanggal yang dipilih
+            if not selected_dates:
+                validation_errors.append("❌ Belum ada tanggal yang dipilih untuk diproses")
+            else:
+                missing_date_cols = day_index.missing(selected_dates)
+                ambiguous_date_cols = day_index.ambiguous_in(selected_dates)
+                
+                if missing_date_cols:
+                    validation_errors.append(f"❌ Kolom tanggal tidak ditemukan di template untuk: {', '.join(map(str, missing_date_cols))}")
+                if ambiguous_date_cols:
+                    detail = "; ".join(f"{date} → {', '.join(map(str, cols))}" for date, cols in ambiguous_date_cols.items())
+                    validation_errors.append(f"❌ Kolom tanggal ambigu di template (lebih dari satu kolom): {detail}")
         
         # Tampilkan hasil validasi
         if validation_errors:
@@ -240,8 +639,8 @@ with tab3:
             
             # Tampilkan perbandingan Crew ID
             if "Crew ID" in template_df.columns and "Crew ID" in input_data_df.columns:
-                template_ids = set(template_df["Crew ID"].astype(str).str.strip())
-                input_ids = set(input_data_df["Crew ID"].astype(str).str.strip())
+                template_ids = template_roster.crew_index
+                input_ids = input_roster.crew_index
                 
                 col_comp1, col_comp2, col_comp3 = st.columns(3)
                 with col_comp1:
@@ -249,20 +648,20 @@ with tab3:
                 with col_comp2:
                     st.metric("ID di Input", len(input_ids))
                 with col_comp3:
-                    matched = len(template_ids.intersection(input_ids))
+                    matched = len(template_ids.matched(input_ids))
                     st.metric("ID yang Cocok", matched)
                 
                 # ID yang tidak cocok
-                missing_in_input = template_ids - input_ids
-                missing_in_template = input_ids - template_ids
+                missing_in_input = template_ids.missing_in(input_ids)
+                missing_in_template = input_ids.missing_in(template_ids)
                 
-                if missing_in_input:
+                if len(missing_in_input) > 0:
                     with st.expander(f"⚠️ ID di Template tapi tidak di Input ({len(missing_in_input)})"):
                         st.write(list(missing_in_input)[:20])
                         if len(missing_in_input) > 20:
                             st.caption(f"... dan {len(missing_in_input) - 20} lainnya")
                 
-                if missing_in_template:
+                if len(missing_in_template) > 0:
                     with st.expander(f"ℹ️ ID di Input tapi tidak di Template ({len(missing_in_template)})"):
                         st.write(list(missing_in_template)[:20])
                         if len(missing_in_template) > 20:
@@ -286,231 +685,303 @@ st.header("⚙️ Proses Data")
 process_disabled = (template_df is None or input_data_df is None or 
                    len(validation_errors) > 0 or not selected_dates)
 
-if st.button("🚀 Proses Semua Tanggal", type="primary", use_container_width=True, disabled=process_disabled):
-    
-    start_time = time.time()
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
+job_manager = get_job_manager()
+process_job = st.session_state.get('process_job')
+job_running = process_job is not None and not process_job.finished
+
+if st.button("🚀 Proses Semua Tanggal", type="primary", use_container_width=True, disabled=process_disabled or job_running):
+    # Pembanding: file yang diunggah, atau hasil proses terakhir untuk template yang sama
+    previous_df, diff_baseline = None, None
+    if previous_roster is not None:
+        previous_df, diff_baseline = previous_roster.df, previous_file.name
+    elif (compare_previous and process_job is not None and process_job.status == "done"
+          and st.session_state.process_context['template_name'] == template_file.name):
+        previous_df = process_job.result['result_df']
+        diff_baseline = f"proses sebelumnya ({datetime.fromtimestamp(process_job.finished_at).strftime('%H:%M:%S')})"
     try:
-        status_text.text("📊 Memulai pemrosesan multi-tanggal...")
-        progress_bar.progress(5)
-        
-        # Statistik keseluruhan
-        total_dates = len(selected_dates)
-        overall_stats = {
-            'total_rows': len(template_df),
-            'dates_processed': 0,
-            'total_matched': 0,
-            'total_not_matched': 0,
-            'total_empty': 0,
-            'date_details': {}
+        process_job = job_manager.submit(
+            process_roster,
+            template_df=template_df,
+            template_roster=template_roster,
+            template_bytes=template_file.getvalue(),
+            input_roster=input_roster,
+            input_name=input_file.name,
+            input_bytes=input_file.getvalue(),
+            date_files={date: (file.name, file.getvalue()) for date, file in st.session_state.additional_files.items()
+                        if date in selected_dates},
+            selected_dates=selected_dates,
+            day_index=day_index,
+            duplicate_policy=duplicate_policy,
+            output_mode=output_mode,
+            apply_formatting=apply_formatting,
+            header=header,
+            run_profile=run_profile,
+            store=get_roster_store() if use_store else None,
+            period=period.strip(),
+            template_name=template_file.name,
+            extra_templates={name: (file.getvalue(), extra_template_rosters[name])
+                             for name, file in extra_template_files.items()},
+            previous_df=previous_df,
+            parse_pool=get_parse_pool(),
+            parse_cache=st.session_state.parse_cache,
+            fill_cache=st.session_state.fill_cache,
+            duty_vocab=st.session_state.duty_vocab
+        )
+        st.session_state.process_job = process_job
+        st.session_state.process_context = {
+            'template_name': template_file.name,
+            'input_name': input_file.name,
+            'selected_dates': list(selected_dates),
+            'additional_files': {date: file.name for date, file in st.session_state.additional_files.items()},
+            'duplicate_policy': duplicate_policy,
+            'show_stats': show_stats,
+            'enable_cprofile': enable_cprofile,
+            'store_period': period.strip() if use_store else None,
+            'diff_baseline': diff_baseline,
         }
+    except JobLimitError as e:
+        st.error(f"❌ {e}")
+
+if process_job is not None and not process_job.finished:
+    render_job_progress(process_job)
+elif process_job is not None and process_job.status == "error":
+    st.error(f"❌ Terjadi kesalahan saat memproses: {str(process_job.error)}")
+    with st.expander("🔍 Detail Error"):
+        st.exception(process_job.error)
+elif process_job is not None:
+    # Hasil job terakhir tetap tersedia setelah rerun (mis. saat widget lain diubah)
+    result = process_job.result
+    context = st.session_state.process_context
+    result_df = result['result_df']
+    overall_stats = result['overall_stats']
+    reused_dates = result['reused_dates']
+    conflict_df = result['conflict_df']
+    output = result['output']
+    patched_cells = result['patched_cells']
+    load_errors = result['load_errors']
+    run_profile = result['run_profile']
+    process_time = result['process_time']
+    template_name = context['template_name']
+    input_name = context['input_name']
+    selected_dates = context['selected_dates']
+    duplicate_policy = context['duplicate_policy']
+    
+    for date, error in sorted(load_errors.items()):
+        st.warning(f"⚠️ Gagal membaca file input tanggal {date} ({context['additional_files'][date]}): {error}. Tanggal ini dilewati.")
+    
+    # Tampilkan hasil
+    st.success(f"✅ Data berhasil diproses untuk {overall_stats['dates_processed']} tanggal dalam {process_time:.2f} detik!")
+    if reused_dates:
+        st.info(f"♻️ {len(reused_dates)} tanggal memakai hasil sebelumnya (input tidak berubah): {', '.join(map(str, reused_dates))}")
+    if patched_cells is not None:
+        st.info(f"🩹 {patched_cells} sel tanggal ditulis ke salinan template asli; isi template lainnya tidak diubah.")
+    for name, dates in result['unpatched_dates'].items():
+        st.warning(f"⚠️ {name}: tanggal {', '.join(map(str, dates))} tidak ditulis ke template karena kolomnya "
+                   "tidak ditemukan atau ganda di baris header sheet.")
+    
+    # Statistik hasil keseluruhan
+    if context['show_stats']:
+        st.subheader("📊 Statistik Hasil Proses")
         
-        # Proses setiap tanggal
-        for idx, date in enumerate(selected_dates):
-            status_text.text(f"🔄 Memproses tanggal {date} ({idx + 1}/{total_dates})...")
-            
-            # Tentukan file input yang akan digunakan
-            if date in st.session_state.additional_files:
-                current_input_file = st.session_state.additional_files[date]
-                current_input_df = pd.read_excel(current_input_file, sheet_name=0, header=1)
-            else:
-                current_input_df = input_data_df
-            
-            # Cari kolom tanggal
-            date_col = None
-            for col in template_df.columns:
-                if str(date) in str(col):
-                    date_col = col
-                    break
-            
-            if date_col is None:
-                continue
-            
-            template_df[date_col] = template_df[date_col].astype(object)
-            
-            # Statistik per tanggal
-            matched_count = 0
-            not_matched_count = 0
-            empty_value_count = 0
-            
-            # Isi data untuk tanggal ini
-            for index, row in template_df.iterrows():
-                crew_id = str(row["Crew ID"]).strip()
-                match = current_input_df[current_input_df["Crew ID"].astype(str).str.strip() == crew_id]
-                
-                if not match.empty:
-                    val = match[date_col].iloc[0] if date_col in current_input_df.columns else None
-                    if pd.notna(val):
-                        template_df.at[index, date_col] = val
-                        matched_count += 1
-                    else:
-                        template_df.at[index, date_col] = "-"
-                        empty_value_count += 1
-                else:
-                    template_df.at[index, date_col] = "-"
-                    not_matched_count += 1
-            
-            # Simpan statistik tanggal ini
-            overall_stats['date_details'][date] = {
-                'matched': matched_count,
-                'not_matched': not_matched_count,
-                'empty': empty_value_count,
-                'file_used': current_input_file.name if date in st.session_state.additional_files else input_file.name
-            }
-            overall_stats['total_matched'] += matched_count
-            overall_stats['total_not_matched'] += not_matched_count
-            overall_stats['total_empty'] += empty_value_count
-            overall_stats['dates_processed'] += 1
-            
-            # Update progress
-            progress = 5 + int(((idx + 1) / total_dates) * 75)
-            progress_bar.progress(progress)
-        
-        progress_bar.progress(80)
-        status_text.text("📝 Membuat file Excel...")
-        
-        # Buat workbook dengan formatting
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Sheet1"
-        
-        # Header
-        ws.append(["OPS - REPORT"])
-        if apply_formatting:
-            header_cell = ws['A1']
-            header_cell.font = Font(bold=True, size=14, color="FFFFFF")
-            header_cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Data
-        for r_idx, r in enumerate(dataframe_to_rows(template_df, index=False, header=True)):
-            ws.append(r)
-            if apply_formatting and r_idx == 0:  # Header row
-                for cell in ws[ws.max_row]:
-                    cell.font = Font(bold=True, color="FFFFFF")
-                    cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-                    cell.alignment = Alignment(horizontal="center", vertical="center")
-                    cell.border = Border(
-                        left=Side(style='thin'),
-                        right=Side(style='thin'),
-                        top=Side(style='thin'),
-                        bottom=Side(style='thin')
-                    )
-        
-        # Auto-adjust column width
-        if apply_formatting:
-            for column in ws.columns:
-                max_length = 0
-                column = [cell for cell in column]
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column[0].column_letter].width = adjusted_width
-        
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
+        # Ringkasan keseluruhan
+        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+        with col_stat1:
+            st.metric("Total Tanggal", overall_stats['dates_processed'])
+        with col_stat2:
+            avg_match = overall_stats['total_matched'] / overall_stats['dates_processed'] if overall_stats['dates_processed'] > 0 else 0
+            st.metric("Rata-rata Match/Tanggal", f"{avg_match:.1f}")
+        with col_stat3:
+            st.metric("Total Data Cocok", overall_stats['total_matched'])
+        with col_stat4:
+            st.metric("Total Tidak Cocok", overall_stats['total_not_matched'])
         
-        progress_bar.progress(100)
-        status_text.text("✅ Selesai!")
+        # Detail per tanggal
+        st.divider()
+        st.subheader("📅 Detail per Tanggal")
         
-        end_time = time.time()
-        process_time = end_time - start_time
+        detail_data = []
+        for date in sorted(overall_stats['date_details'].keys()):
+            detail = overall_stats['date_details'][date]
+            detail_data.append({
+                'Tanggal': date,
+                'Data Cocok': detail['matched'],
+                'Tidak Cocok': detail['not_matched'],
+                'Nilai Kosong': detail['empty'],
+                'Konflik': detail.get('conflicts', 0),
+                'File Input': detail['file_used']
+            })
         
-        # Tampilkan hasil
-        st.success(f"✅ Data berhasil diproses untuk {overall_stats['dates_processed']} tanggal dalam {process_time:.2f} detik!")
+        detail_df = pd.DataFrame(detail_data)
+        st.dataframe(detail_df, use_container_width=True, hide_index=True)
         
-        # Statistik hasil keseluruhan
-        if show_stats:
-            st.subheader("📊 Statistik Hasil Proses")
-            
-            # Ringkasan keseluruhan
-            col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
-            with col_stat1:
-                st.metric("Total Tanggal", overall_stats['dates_processed'])
-            with col_stat2:
-                avg_match = overall_stats['total_matched'] / overall_stats['dates_processed'] if overall_stats['dates_processed'] > 0 else 0
-                st.metric("Rata-rata Match/Tanggal", f"{avg_match:.1f}")
-            with col_stat3:
-                st.metric("Total Data Cocok", overall_stats['total_matched'])
-            with col_stat4:
-                st.metric("Total Tidak Cocok", overall_stats['total_not_matched'])
-            
-            # Detail per tanggal
+        # Statistik per template (mode banyak template)
+        if result['template_stats']:
             st.divider()
-            st.subheader("📅 Detail per Tanggal")
-            
-            detail_data = []
-            for date in sorted(overall_stats['date_details'].keys()):
-                detail = overall_stats['date_details'][date]
-                detail_data.append({
-                    'Tanggal': date,
-                    'Data Cocok': detail['matched'],
-                    'Tidak Cocok': detail['not_matched'],
-                    'Nilai Kosong': detail['empty'],
-                    'File Input': detail['file_used']
-                })
-            
-            detail_df = pd.DataFrame(detail_data)
-            st.dataframe(detail_df, use_container_width=True, hide_index=True)
+            st.subheader("🗂️ Statistik per Template")
+            st.caption(f"Detail per tanggal di atas untuk template {template_name}")
+            st.dataframe(pd.DataFrame(result['template_stats']), use_container_width=True, hide_index=True)
         
-        # Preview hasil
-        st.subheader("📊 Preview Hasil Akhir")
-        st.dataframe(template_df, use_container_width=True)
+        # Rincian waktu per tahap
+        st.divider()
+        st.subheader("⏱️ Rincian Waktu per Tahap")
         
-        # Tombol download
-        col_dl1, col_dl2, col_dl3 = st.columns([1, 2, 1])
-        with col_dl2:
+        stage_data = []
+        for record in run_profile.stages:
+            stage_data.append({
+                'Tahap': record['stage'] + (f" (tgl {record['date']})" if 'date' in record else "")
+                         + (" (hasil parsing awal, dari cache)" if record.get('cached') else ""),
+                'Durasi (detik)': record['seconds'],
+                'Baris': record['rows'],
+                'Puncak Memori (MB)': record.get('peak_mb'),
+                'Max RSS Proses (MB)': record['process_max_rss_mb']
+            })
+        st.dataframe(pd.DataFrame(stage_data), use_container_width=True, hide_index=True)
+        st.caption("Max RSS Proses = puncak memori seluruh proses server sejak dimulai, tercatat di akhir tahap; "
+                   "bukan pemakaian tahap itu sendiri.")
+        shared_stages = [record['stage'] for record in run_profile.stages if record.get('peak_shared')]
+        if shared_stages:
+            st.caption(f"⚠️ Puncak memori tahap {', '.join(dict.fromkeys(shared_stages))} ikut menghitung job lain "
+                       f"yang berjalan bersamaan di server, sehingga tidak akurat")
+    
+    # Konflik Crew ID duplikat
+    if not conflict_df.empty:
+        st.warning(f"⚠️ {len(conflict_df)} kombinasi Crew ID & tanggal memiliki nilai berbeda di baris duplikat "
+                   f"(kebijakan: {DUPLICATE_POLICIES[duplicate_policy]})."
+                   + (" Detail ada di sheet 'Konflik Duplikat'." if patched_cells is None
+                      else " Template asli tidak diberi sheet tambahan; unduh laporannya di bawah."))
+        with st.expander(f"🔀 Laporan Konflik Crew ID Duplikat ({len(conflict_df)})"):
+            render_preview(conflict_df, "preview_conflicts")
+        if patched_cells is not None:
             st.download_button(
-                label="⬇️ Download Hasil sebagai Excel",
-                data=output,
-                file_name=output_filename + ".xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                type="primary",
-                use_container_width=True
+                label="⬇️ Download Laporan Konflik (CSV)",
+                data=conflict_df.to_csv(index=False).encode("utf-8"),
+                file_name=output_filename + "_konflik.csv",
+                mime="text/csv"
             )
-        
-        # Log aktivitas
-        with st.expander("📝 Log Aktivitas"):
-            log_text = f"""
-Waktu Proses: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    
+    # Perubahan dari hasil sebelumnya
+    diff_df = result['diff_df']
+    if diff_df is not None:
+        st.subheader("🔍 Perubahan dari Hasil Sebelumnya")
+        st.caption(f"Pembanding: {context['diff_baseline']}")
+        if diff_df.empty:
+            st.info("Tidak ada sel tanggal yang berubah")
+        else:
+            counts = change_counts(diff_df)
+            col_diff1, col_diff2, col_diff3, col_diff4 = st.columns(4)
+            with col_diff1:
+                st.metric("Total Sel Berubah", len(diff_df))
+            with col_diff2:
+                st.metric("Diubah", counts["Diubah"])
+            with col_diff3:
+                st.metric("Ditambah", counts["Ditambah"])
+            with col_diff4:
+                st.metric("Dihapus", counts["Dihapus"])
+            render_preview(diff_df, "preview_diff", height=300)
+            col_chg1, col_chg2 = st.columns(2)
+            with col_chg1:
+                st.download_button(
+                    label="⬇️ Download Daftar Perubahan (CSV)",
+                    data=diff_df.to_csv(index=False).encode("utf-8"),
+                    file_name=output_filename + "_perubahan.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+            with col_chg2:
+                st.download_button(
+                    label="⬇️ Download Hasil dengan Sel Berubah Diwarnai (Excel)",
+                    data=result['changes_output'],
+                    file_name=output_filename + "_perubahan.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
+    
+    # Preview hasil
+    st.subheader("📊 Preview Hasil Akhir")
+    render_preview(result_df, "preview_result", selected_dates)
+    
+    # Tombol download
+    col_dl1, col_dl2, col_dl3 = st.columns([2, 2, 1])
+    with col_dl1:
+        st.download_button(
+            label="⬇️ Download Semua Hasil (ZIP)" if result['output_kind'] == "zip" else "⬇️ Download Hasil sebagai Excel",
+            data=output,
+            file_name=output_filename + "." + result['output_kind'],
+            mime=OUTPUT_MIME_TYPES[result['output_kind']],
+            type="primary",
+            use_container_width=True
+        )
+    with col_dl2:
+        st.download_button(
+            label="⬇️ Download Profil Proses (JSON)",
+            data=run_profile.to_json(
+                template=template_name,
+                input=input_name,
+                dates=selected_dates,
+                stats=overall_stats
+            ),
+            file_name=output_filename + "_profile.json",
+            mime="application/json",
+            use_container_width=True
+        )
+    
+    if context['store_period']:
+        with st.expander(f"🗄️ Riwayat Ingest Roster Store (periode {context['store_period']})"):
+            st.dataframe(get_roster_store().ingest_history(context['store_period']), use_container_width=True, hide_index=True)
+            crew_query = st.text_input(
+                "🔎 Riwayat Sel per Crew ID", key="store_crew_history",
+                help="Semua nilai yang pernah mengisi sel crew ini beserta file sumbernya, termasuk nilai yang sudah tergantikan"
+            )
+            if crew_query.strip():
+                st.dataframe(get_roster_store().crew_history(context['store_period'], crew_query.strip()),
+                             use_container_width=True, hide_index=True)
+    
+    if context['enable_cprofile']:
+        with st.expander("🧪 Hasil cProfile"):
+            st.code(run_profile.cprofile_text())
+    
+    # Log aktivitas
+    with st.expander("📝 Log Aktivitas"):
+        log_text = f"""
+Waktu Proses: {datetime.fromtimestamp(process_job.finished_at).strftime('%Y-%m-%d %H:%M:%S')}
 Durasi: {process_time:.2f} detik
-File Template: {template_file.name}
-File Input Utama: {input_file.name}
+File Template: {template_name}
+File Input Utama: {input_name}
 Tanggal Diproses: {', '.join(map(str, selected_dates))}
 Total Tanggal: {overall_stats['dates_processed']}
 Total Baris: {overall_stats['total_rows']}
 Total Data Cocok: {overall_stats['total_matched']}
 Total Tidak Cocok: {overall_stats['total_not_matched']}
 Total Nilai Kosong: {overall_stats['total_empty']}
+Kebijakan Duplikat: {DUPLICATE_POLICIES[duplicate_policy]}
+Total Konflik Duplikat: {overall_stats['total_conflicts']}
+Tanggal Dipakai Ulang: {', '.join(map(str, reused_dates)) or '-'}
+Roster Store: {context['store_period'] or '-'}
+Mode Output: {"Tambal template asli (" + str(patched_cells) + " sel)" if patched_cells is not None else "Workbook baru"}
+Perubahan dari Hasil Sebelumnya: {f"{len(diff_df)} sel (pembanding: {context['diff_baseline']})" if diff_df is not None else '-'}
 
-Detail File Tambahan:
+Waktu per Tahap:
 """
-            if st.session_state.additional_files:
-                for date, file in st.session_state.additional_files.items():
-                    log_text += f"  - Tanggal {date}: {file.name}\n"
-            else:
-                log_text += "  - Tidak ada file tambahan\n"
-            
-            st.code(log_text)
-        
-        time.sleep(0.5)
-        progress_bar.empty()
-        status_text.empty()
+        for stage, seconds in run_profile.summary().items():
+            log_text += f"  - {stage}: {seconds:.3f} detik\n"
+        if result['template_stats']:
+            log_text += "\nStatistik per Template:\n"
+            for row in result['template_stats']:
+                if row['Status'] != "OK":
+                    log_text += f"  - {row['Template']}: {row['Status']}\n"
+                else:
+                    log_text += (f"  - {row['Template']}: {row['Tanggal']} tanggal, cocok {row['Data Cocok']}, "
+                                 f"tidak cocok {row['Tidak Cocok']}, kosong {row['Nilai Kosong']}\n")
+        log_text += "\nDetail File Tambahan:\n"
+        if context['additional_files']:
+            for date, name in context['additional_files'].items():
+                status = " (gagal dibaca, dilewati)" if date in load_errors else ""
+                log_text += f"  - Tanggal {date}: {name}{status}\n"
+        else:
+            log_text += "  - Tidak ada file tambahan\n"
         
-    except Exception as e:
-        progress_bar.empty()
-        status_text.empty()
-        st.error(f"❌ Terjadi kesalahan saat memproses: {str(e)}")
-        with st.expander("🔍 Detail Error"):
-            st.exception(e)
-
+        st.code(log_text)
+    
 elif template_df is None or input_data_df is None:
     st.warning("⚠️ Silakan upload kedua file terlebih dahulu")
 elif not selected_dates:
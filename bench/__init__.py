@@ -0,0 +1 @@
+"""Generator data sintetis dan benchmark pipeline CR filling."""
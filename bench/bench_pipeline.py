@@ -0,0 +1,117 @@
+"""Benchmark parsing, validasi, fill dan ekspor pada berbagai ukuran roster.
+
+Hasil ditulis ke JSON agar bisa dibandingkan antar versi:
+    python -m bench.bench_pipeline --scales 100,1000,10000 --repeat 3 --output bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+import pandas as pd
+
+from bench.generate_roster import generate_workbooks
+from crfill.engine import AUTO_HEADER, CrewIndex, DayColumnIndex, fill_roster
+from crfill.export import build_report
+from crfill.profiling import RunProfile
+from crfill.reader import ALL_DAYS, HAS_CALAMINE, read_roster
+
+DEFAULT_SCALES = [100, 1000, 5000, 10000, 50000]
+STAGES = ["parse_template", "parse_input", "validation", "fill", "export"]
+
+
+def run_pipeline(paths, dates):
+    """Satu putaran penuh; kembalikan RunProfile berisi tahap-tahap di STAGES.
+
+    Baris header dicari otomatis (`AUTO_HEADER`), sama seperti bawaan app dan CLI.
+    """
+    profile = RunProfile()
+
+    with profile.stage("parse_template") as record:
+        template_df = read_roster(paths['template'], header=AUTO_HEADER)
+        record['rows'] = len(template_df)
+    with profile.stage("parse_input") as record:
+        input_df = read_roster(paths['input'], days=ALL_DAYS, header=AUTO_HEADER)
+        record['rows'] = len(input_df)
+
+    with profile.stage("validation", rows=len(template_df) + len(input_df)):
+        day_index = DayColumnIndex(template_df.columns)
+        day_index.missing(dates)
+        template_ids = CrewIndex.from_frame(template_df)
+        input_ids = CrewIndex.from_frame(input_df)
+        template_ids.matched(input_ids), template_ids.missing_in(input_ids), input_ids.missing_in(template_ids)
+
+    with profile.stage("fill", rows=len(template_df)):
+        result_df = template_df.copy()
+        fill_roster(result_df, dates, (input_df, "input.xlsx"), day_index=day_index, template_index=template_ids)
+
+    with profile.stage("export", rows=len(result_df)):
+        build_report(result_df, apply_formatting=True)
+
+    return profile
+
+
+def bench_scale(n_crew, repeat, work_dir, extra_columns=0):
+    paths = generate_workbooks(os.path.join(work_dir, f"crew_{n_crew}"), n_crew=n_crew,
+                               extra_columns=extra_columns)
+    dates = list(range(1, 32))
+    timings = {stage: [] for stage in STAGES}
+    for _ in range(repeat):
+        profile = run_pipeline(paths, dates)
+        for stage, seconds in profile.summary().items():
+            timings[stage].append(seconds)
+
+    return [{
+        'crew': n_crew,
+        'stage': stage,
+        'min_seconds': round(min(values), 6),
+        'median_seconds': round(statistics.median(values), 6),
+        'repeat': repeat,
+    } for stage, values in timings.items()]
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline CR filling")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="Jumlah crew dipisah koma")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--extra-columns", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    scales = [int(x) for x in args.scales.split(",") if x.strip()]
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_crew in scales:
+            rows = bench_scale(n_crew, args.repeat, work_dir, extra_columns=args.extra_columns)
+            results.extend(rows)
+            print(f"{n_crew:>6} crew: " + ", ".join(f"{r['stage']}={r['min_seconds']:.3f}s" for r in rows))
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'calamine': HAS_CALAMINE,
+        'extra_columns': args.extra_columns,
+        'results': results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Generator workbook template & input sintetis dengan layout yang dipakai app.py.
+
+Header berada di baris ke-2 (baris 1 berisi judul), kolom "Crew ID" dan
+kolom tanggal 1-31.
+
+Contoh:
+    python -m bench.generate_roster --crew 5000 --per-date 3 --extra-columns 100 --out data/
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from crfill.export import build_report
+
+DUTY_CODES = ["OFF", "SBY", "RSV", "AL", "SL", "TRN", "MED", "DH"]
+FLIGHT_PREFIXES = ["GA", "QG", "JT", "ID"]
+RANKS = ["CPT", "FO", "FA", "FM"]
+
+
+def _crew_ids(rng, n):
+    ids = rng.choice(np.arange(10000, 10000 + n * 10), size=n, replace=False)
+    return ids.astype(str)
+
+
+def _duty_values(rng, n, empty_rate):
+    codes = np.array(DUTY_CODES + [f"{p}{num}" for p in FLIGHT_PREFIXES for num in range(100, 160)], dtype=object)
+    values = codes[rng.integers(0, len(codes), n)]
+    values[rng.random(n) < empty_rate] = None
+    return values
+
+
+def make_roster_frames(n_crew=1000, days=31, missing_rate=0.05, unknown_rate=0.02,
+                       duplicate_rate=0.0, empty_rate=0.05, extra_columns=0, seed=0):
+    """Buat pasangan (template_df, input_df).
+
+    - `missing_rate`: porsi crew template yang tidak ada di input
+    - `unknown_rate`: porsi baris input dengan Crew ID yang tidak ada di template
+    - `duplicate_rate`: porsi Crew ID input yang muncul dua kali dengan nilai berbeda
+    - `empty_rate`: porsi sel tanggal kosong di input
+    - `extra_columns`: jumlah kolom tambahan (kualifikasi, base, catatan) di input
+    """
+    rng = np.random.default_rng(seed)
+    ids = _crew_ids(rng, n_crew)
+    day_cols = list(range(1, days + 1))
+
+    template_df = pd.DataFrame({
+        "No": np.arange(1, n_crew + 1),
+        "Crew ID": ids,
+        "Name": [f"CREW {i}" for i in range(n_crew)],
+        "Rank": np.array(RANKS, dtype=object)[rng.integers(0, len(RANKS), n_crew)],
+    })
+    for day in day_cols:
+        template_df[day] = None
+
+    present = ids[rng.random(n_crew) >= missing_rate]
+    n_unknown = int(len(present) * unknown_rate)
+    unknown = np.array([f"X{i:06d}" for i in range(n_unknown)], dtype=object)
+    n_dup = int(len(present) * duplicate_rate)
+    duplicates = rng.choice(present, size=n_dup, replace=False) if n_dup else np.array([], dtype=object)
+
+    input_ids = np.concatenate([present, unknown, duplicates]).astype(object)
+    rng.shuffle(input_ids)
+    n_input = len(input_ids)
+
+    columns = {"Crew ID": input_ids}
+    for k in range(extra_columns):
+        columns[f"Info {k + 1}"] = np.array(["A", "B", "C", None], dtype=object)[rng.integers(0, 4, n_input)]
+    for day in day_cols:
+        columns[day] = _duty_values(rng, n_input, empty_rate)
+    input_df = pd.DataFrame(columns)
+
+    return template_df, input_df
+
+
+def make_per_date_frames(input_df, dates, change_rate=0.1, seed=1):
+    """Salinan input per tanggal dengan sebagian nilai tanggal tersebut diubah."""
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for date in dates:
+        df = input_df.copy()
+        changed = rng.random(len(df)) < change_rate
+        df.loc[changed, date] = _duty_values(rng, int(changed.sum()), 0.0)
+        frames[date] = df
+    return frames
+
+
+def write_roster(df, path):
+    """Tulis DataFrame dengan judul di baris 1 dan header di baris 2."""
+    output = build_report(df, apply_formatting=False)
+    with open(path, "wb") as f:
+        f.write(output.getbuffer())
+    return path
+
+
+def generate_workbooks(out_dir, n_crew=1000, per_date=0, **options):
+    """Tulis template.xlsx, input.xlsx dan day_XX.xlsx ke `out_dir`; kembalikan path-nya."""
+    os.makedirs(out_dir, exist_ok=True)
+    template_df, input_df = make_roster_frames(n_crew=n_crew, **options)
+    paths = {
+        'template': write_roster(template_df, os.path.join(out_dir, "template.xlsx")),
+        'input': write_roster(input_df, os.path.join(out_dir, "input.xlsx")),
+        'date_inputs': {},
+    }
+    for date, df in make_per_date_frames(input_df, list(range(1, per_date + 1))).items():
+        paths['date_inputs'][date] = write_roster(df, os.path.join(out_dir, f"day_{date:02d}.xlsx"))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generator roster sintetis")
+    parser.add_argument("--out", required=True, help="Folder output")
+    parser.add_argument("--crew", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--missing-rate", type=float, default=0.05)
+    parser.add_argument("--unknown-rate", type=float, default=0.02)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--empty-rate", type=float, default=0.05)
+    parser.add_argument("--extra-columns", type=int, default=0)
+    parser.add_argument("--per-date", type=int, default=0, help="Jumlah file input per tanggal (day_01..)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    paths = generate_workbooks(
+        args.out, n_crew=args.crew, per_date=args.per_date, days=args.days,
+        missing_rate=args.missing_rate, unknown_rate=args.unknown_rate,
+        duplicate_rate=args.duplicate_rate, empty_rate=args.empty_rate,
+        extra_columns=args.extra_columns, seed=args.seed,
+    )
+    print(f"Template: {paths['template']}")
+    print(f"Input: {paths['input']}")
+    for date, path in paths['date_inputs'].items():
+        print(f"Tanggal {date}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Komponen inti Automated CR Filling yang dapat dipakai di luar Streamlit."""
+from crfill.engine import (
+    DUPLICATE_POLICIES,
+    CrewIndex,
+    DayColumnIndex,
+    Roster,
+    conflict_report,
+    fill_roster,
+    normalize_crew_ids,
+    parse_day,
+)
+
+__all__ = [
+    "DUPLICATE_POLICIES",
+    "CrewIndex",
+    "DayColumnIndex",
+    "Roster",
+    "conflict_report",
+    "fill_roster",
+    "normalize_crew_ids",
+    "parse_day",
+]
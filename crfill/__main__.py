@@ -0,0 +1,5 @@
+import sys
+
+from crfill.cli import main
+
+sys.exit(main())
@@ -0,0 +1,239 @@
+"""Cache hasil parsing file upload agar tidak dibaca ulang di setiap rerun Streamlit."""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # cache Parquet tidak tersedia
+    pa = pq = None
+
+
+def content_digest(data):
+    """SHA-256 (hex) isi file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def content_key(data, **options):
+    """Kunci cache: SHA-256 isi file + opsi pembacaan."""
+    return content_digest(data), tuple(sorted((k, repr(v)) for k, v in options.items()))
+
+
+class ParseCache:
+    """LRU cache DataFrame hasil parsing, dibatasi jumlah entri dan total ukuran.
+
+    DataFrame yang dikembalikan dipakai bersama; salin dulu sebelum diubah.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Dipakai bersama oleh thread script dan job latar belakang
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, data, **options):
+        """Hasil parsing `data` yang sudah ada di cache, atau None."""
+        key = content_key(data, **options)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def get_or_parse(self, data, parser=None, **options):
+        """Kembalikan hasil parsing `data` (bytes), parsing hanya jika belum ada di cache."""
+        key = content_key(data, **options)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        parser = parser or pd.read_excel
+        value = parser(BytesIO(data), **options)
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = _estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            # Buang entri paling lama tidak dipakai, tapi selalu simpan entri terbaru
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                self._evict(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def _evict(self, key):
+        del self._entries[key]
+        self.total_bytes -= self._sizes.pop(key)
+
+
+def _estimate_size(value):
+    value = getattr(value, "df", value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return 0
+
+
+class ParquetCache:
+    """Salinan Parquet DataFrame hasil parsing xlsx di direktori lokal.
+
+    Bertahan antar sesi dan restart, sehingga template bulanan yang sama tidak
+    perlu di-parse ulang dari Excel keesokan harinya. Label kolom (int, datetime,
+    dll.) dan kolom object bertipe campuran disimpan dengan penanda tipe agar
+    hasil baca identik dengan hasil parsing aslinya. DataFrame yang tidak bisa
+    disimpan dilewati begitu saja. Membutuhkan `pyarrow`.
+    """
+
+    def __init__(self, directory, max_bytes=2 * 1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path_for(self, key):
+        name = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, name + ".parquet")
+
+    def get(self, key):
+        """DataFrame tersimpan untuk `key`, atau None."""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            table = pq.read_table(path)
+            meta = json.loads(table.schema.metadata[_PARQUET_META_KEY])
+            df = table.to_pandas()
+        except Exception:
+            # File rusak atau format lama: anggap tidak ada, akan ditulis ulang
+            _remove(path)
+            return None
+        os.utime(path)
+        for col in meta['mixed']:
+            df[col] = pd.Series([_untag(v) for v in df[col]], index=df.index, dtype=object)
+        df.columns = [_untag(label) for label in meta['columns']]
+        return df
+
+    def put(self, key, df):
+        """Simpan `df`; True jika berhasil."""
+        try:
+            columns = [_tag(label) for label in df.columns]
+            stored = df.copy(deep=False)
+            stored.columns = [str(i) for i in range(len(df.columns))]
+            mixed = []
+            for col in stored.columns:
+                if stored[col].dtype == object and pd.api.types.infer_dtype(stored[col], skipna=True) != "empty":
+                    stored[col] = [None if _isna(v) else json.dumps(_tag(v)) for v in stored[col]]
+                    mixed.append(col)
+            table = pa.Table.from_pandas(stored, preserve_index=False)
+        except (TypeError, ValueError, pa.ArrowException):
+            return False
+
+        meta = json.dumps({'columns': columns, 'mixed': mixed}).encode("utf-8")
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _PARQUET_META_KEY: meta})
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        # Tulis ke file sementara lalu ganti, aman jika beberapa proses menulis kunci yang sama
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        self._prune()
+        return True
+
+    def clear(self):
+        for path in self._files():
+            _remove(path)
+
+    def _files(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".parquet")]
+
+    def _prune(self):
+        # Hapus file paling lama tidak dipakai sampai total ukuran di bawah batas
+        files = sorted(self._files(), key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in files)
+        while len(files) > 1 and total > self.max_bytes:
+            path = files.pop(0)
+            total -= os.path.getsize(path)
+            _remove(path)
+
+
+_PARQUET_META_KEY = b"crfill"
+
+
+def _tag(value):
+    # Nilai skalar -> [tipe, nilai] yang aman untuk JSON
+    if value is None or _isna(value):
+        return ["n", None]
+    if isinstance(value, (bool, np.bool_)):
+        return ["b", bool(value)]
+    if isinstance(value, (int, np.integer)):
+        return ["i", int(value)]
+    if isinstance(value, (float, np.floating)):
+        return ["f", float(value)]
+    if isinstance(value, str):
+        return ["s", value]
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return ["T", pd.Timestamp(value).isoformat()]
+    if isinstance(value, datetime):
+        return ["t", value.isoformat()]
+    if isinstance(value, time):
+        return ["c", value.isoformat()]
+    raise TypeError(f"Tipe nilai tidak didukung cache Parquet: {type(value).__name__}")
+
+
+def _untag(tagged):
+    if isinstance(tagged, str):
+        tagged = json.loads(tagged)
+    elif not isinstance(tagged, list):  # sel kosong
+        return np.nan
+    kind, value = tagged
+    if kind == "n":
+        return np.nan
+    if kind == "T":
+        return pd.Timestamp(value)
+    if kind == "t":
+        return datetime.fromisoformat(value)
+    if kind == "c":
+        return time.fromisoformat(value)
+    return value
+
+
+def _isna(value):
+    return not isinstance(value, (list, tuple, np.ndarray)) and pd.isna(value)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,367 @@
+"""Entry point baris perintah untuk mengisi Collective Roster tanpa Streamlit.
+
+Contoh:
+    python -m crfill --template CR.xlsx --input input.xlsx --dates 1-31 --output hasil.xlsx
+    python -m crfill --manifest jobs.json --workers 8
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from crfill.cache import content_digest
+from crfill.diff import change_counts, diff_rosters
+from crfill.engine import AUTO_HEADER, DUPLICATE_POLICIES, DayColumnIndex, conflict_report, fill_roster
+from crfill.export import build_report, is_macro_workbook, patch_template
+from crfill.fanout import bundle_zip, fan_out, filled_names, template_stats, unique_names
+from crfill.reader import EXTENSIONS, read_roster
+from crfill.store import RosterStore
+
+# Nama file per tanggal harus memakai penanda eksplisit; angka lain di nama file (mis. tahun) tidak ditebak
+DAY_FILE_PATTERN = re.compile(r"^(?:day|tgl|tanggal)[_\- ]?(\d{1,2})$", re.IGNORECASE)
+ISO_FILE_PATTERN = re.compile(r"(?:^|[_\- ])\d{4}-\d{2}-(\d{2})$")
+
+
+def parse_dates(spec):
+    """Ubah "1-5,7,9" (atau list) menjadi list tanggal 1..31 tanpa duplikat."""
+    if isinstance(spec, (list, tuple)):
+        parts = [str(p) for p in spec]
+    else:
+        parts = [p.strip() for p in str(spec).split(",") if p.strip()]
+
+    dates = []
+    for part in parts:
+        if "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+            if start > end:
+                raise ValueError(f"Tanggal awal tidak boleh lebih besar dari tanggal akhir: {part}")
+            days = range(start, end + 1)
+        else:
+            days = [int(part)]
+        for day in days:
+            if not 1 <= day <= 31:
+                raise ValueError(f"Tanggal di luar rentang 1-31: {day}")
+            if day not in dates:
+                dates.append(day)
+    return dates
+
+
+def scan_date_dir(directory):
+    """Cari file per tanggal di folder -> ({tanggal: path}, [file yang dilewati]).
+
+    Hanya nama dengan penanda tanggal eksplisit yang dipakai: `day_07.xlsx`,
+    `tgl-7.csv`, `tanggal 07.xlsx` atau tanggal ISO lengkap
+    (`input_2025-01-07.xlsx`). File lain (mis. `CR_FEB2025.xlsx`) dan file kedua
+    untuk tanggal yang sama dilewati, bukan ditebak.
+    """
+    found = {}
+    skipped = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower().lstrip(".") not in EXTENSIONS or name.startswith("~$"):
+            continue
+        match = DAY_FILE_PATTERN.match(stem) or ISO_FILE_PATTERN.search(stem)
+        day = int(match.group(1)) if match else None
+        if day is None or not 1 <= day <= 31 or day in found:
+            skipped.append(name)
+            continue
+        found[day] = os.path.join(directory, name)
+    return found, skipped
+
+
+def run_job(job):
+    """Jalankan satu job dan kembalikan ringkasan berisi `overall_stats`.
+
+    Job dengan lebih dari satu template (`templates`) mengisi semuanya dari input
+    yang sama secara paralel dan menulis ZIP ke `output`. Dengan `previous`
+    (file hasil sebelumnya, satu template saja) sel yang berubah dihitung dan,
+    di mode report, diwarnai serta didaftar di sheet "Perubahan".
+    """
+    start_time = time.time()
+    dates = parse_dates(job["dates"])
+    templates = job.get("templates") or [job["template"]]
+    if job.get("previous") and len(templates) > 1:
+        raise ValueError("'previous' hanya bisa dipakai dengan satu template")
+
+    date_files = {}
+    skipped_files = []
+    if job.get("date_dir"):
+        found, skipped_files = scan_date_dir(job["date_dir"])
+        date_files.update(found)
+    date_files.update({int(k): v for k, v in (job.get("date_inputs") or {}).items()})
+
+    header_row = job.get("header_row", AUTO_HEADER)
+    read_options = {'header': header_row if header_row == AUTO_HEADER else int(header_row) - 1,
+                    'cache_dir': job.get("cache_dir")}
+    input_df = read_roster(job["input"], days=dates, **read_options)
+    date_inputs = {
+        date: (read_roster(path, days=[date], **read_options), os.path.basename(path))
+        for date, path in date_files.items() if date in dates
+    }
+
+    default_input = (input_df, os.path.basename(job["input"]))
+    duplicate_policy = job.get("duplicate_policy", "first")
+    store, period = None, job.get("period")
+    if job.get("store"):
+        # Masukkan input job ini ke store; template lalu diisi dari semua tanggal periode tersebut
+        if not period:
+            raise ValueError("job dengan 'store' membutuhkan 'period'")
+        store = RosterStore(job["store"])
+        for date in dates:
+            path = date_files.get(date, job["input"])
+            input_df, name = date_inputs.get(date, default_input)
+            with open(path, "rb") as f:
+                input_key = content_digest(f.read())
+            if not store.is_current(period, date, input_key, duplicate_policy):
+                store.ingest(period, input_df, [date], name, input_key, duplicate_policy)
+
+    unpatched_dates = {}
+
+    def export(template_path, result_df, overall_stats, day_index, changes=None, name=None):
+        if job.get("output_mode") == "patch":
+            output, _, unpatched = patch_template(template_path, result_df, list(overall_stats['date_details']),
+                                                  day_index, header=read_options['header'])
+            if unpatched:
+                unpatched_dates[name or os.path.basename(template_path)] = unpatched
+        else:
+            conflict_df = conflict_report(default_input, date_inputs,
+                                          [date for date in dates if date in overall_stats['date_details']],
+                                          day_index)
+            extra_sheets = {}
+            if not conflict_df.empty:
+                extra_sheets["Konflik Duplikat"] = conflict_df
+            if changes is not None and not changes.empty:
+                extra_sheets["Perubahan"] = changes
+            output = build_report(result_df, apply_formatting=job.get("apply_formatting", True),
+                                  extra_sheets=extra_sheets or None, changes=changes)
+        return output.getvalue()
+
+    if len(templates) > 1:
+        # Nama file yang sama dari folder berbeda (atau path yang diulang) tidak boleh saling menimpa di ZIP
+        paths = dict(zip(unique_names([os.path.basename(path) for path in templates]), templates))
+        results = fan_out({name: read_roster(path, **read_options) for name, path in paths.items()}, dates,
+                          default_input, date_inputs, duplicate_policy=duplicate_policy, store=store, period=period,
+                          export=lambda name, *args: export(paths[name], *args, name=name))
+        failed = {name: result['error'] for name, result in results.items() if 'error' in result}
+        if failed:
+            raise ValueError("; ".join(f"{name}: {error}" for name, error in failed.items()))
+        output_names = filled_names(results, lambda name: _output_extension(job, paths[name]))
+        output = bundle_zip({output_names[name]: result['output'] for name, result in results.items()})
+        with open(job["output"], "wb") as f:
+            f.write(output.getbuffer())
+        return {
+            'output': job["output"],
+            'duration': round(time.time() - start_time, 3),
+            'stats': _combined_stats(results),
+            'skipped_files': skipped_files,
+            'unpatched_dates': unpatched_dates,
+            'templates': template_stats(results),
+        }
+
+    template_df = read_roster(templates[0], **read_options)
+    day_index = DayColumnIndex(template_df.columns)
+    if store is not None:
+        overall_stats = store.fill(template_df, period, store.days(period), day_index=day_index)
+    else:
+        overall_stats = fill_roster(template_df, dates, default_input, date_inputs,
+                                    day_index=day_index, duplicate_policy=duplicate_policy)
+    changes = None
+    if job.get("previous"):
+        changes = diff_rosters(read_roster(job["previous"], **read_options), template_df)
+    with open(job["output"], "wb") as f:
+        f.write(export(templates[0], template_df, overall_stats, day_index, changes))
+
+    return {
+        'output': job["output"],
+        'duration': round(time.time() - start_time, 3),
+        'stats': overall_stats,
+        'changes': change_counts(changes) if changes is not None else None,
+        'skipped_files': skipped_files,
+        'unpatched_dates': unpatched_dates,
+        'missing_dates': day_index.missing(dates),
+        'ambiguous_dates': {d: [str(c) for c in cols] for d, cols in day_index.ambiguous_in(dates).items()},
+    }
+
+
+def _output_extension(job, template_path):
+    # Template dengan macro yang ditambal tetap harus bernama .xlsm agar bisa dibuka Excel
+    if job.get("output_mode") == "patch":
+        with open(template_path, "rb") as f:
+            if is_macro_workbook(f.read()):
+                return "xlsm"
+    return "xlsx"
+
+
+def _combined_stats(results):
+    # Total semua template, untuk baris ringkasan job
+    combined = {key: 0 for key in ('total_rows', 'dates_processed', 'total_matched', 'total_not_matched',
+                                   'total_empty', 'total_conflicts')}
+    for result in results.values():
+        for key in combined:
+            combined[key] += result['overall_stats'][key]
+    return combined
+
+
+def load_manifest(path):
+    """Baca manifest JSON (list job atau {"jobs": [...]}); path relatif terhadap manifest."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    jobs = data["jobs"] if isinstance(data, dict) else data
+    base = os.path.dirname(os.path.abspath(path))
+
+    def resolve(p):
+        return p if os.path.isabs(p) else os.path.join(base, p)
+
+    for job in jobs:
+        for key in ("template", "input", "output", "date_dir", "cache_dir", "store", "previous"):
+            if job.get(key):
+                job[key] = resolve(job[key])
+        if job.get("templates"):
+            job["templates"] = [resolve(p) for p in job["templates"]]
+        if job.get("date_inputs"):
+            job["date_inputs"] = {k: resolve(v) for k, v in job["date_inputs"].items()}
+    return jobs
+
+
+def run_jobs(jobs, workers=None):
+    """Jalankan banyak job paralel di process pool; error dicatat per job."""
+    results = [None] * len(jobs)
+    if len(jobs) == 1 or workers == 1:
+        for i, job in enumerate(jobs):
+            results[i] = _safe_run(job)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_safe_run, job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def _safe_run(job):
+    try:
+        return run_job(job)
+    except Exception as e:
+        return {'output': job.get("output"), 'error': f"{type(e).__name__}: {e}"}
+
+
+def format_summary(result):
+    if 'error' in result:
+        return f"❌ {result['output']}: {result['error']}"
+    stats = result['stats']
+    line = (f"✅ {result['output']} ({result['duration']:.2f} detik) - "
+            f"Tanggal: {stats['dates_processed']}, Baris: {stats['total_rows']}, "
+            f"Cocok: {stats['total_matched']}, Tidak Cocok: {stats['total_not_matched']}, "
+            f"Kosong: {stats['total_empty']}, Konflik: {stats['total_conflicts']}")
+    if result.get('missing_dates'):
+        line += f"\n   ⚠️ Kolom tanggal tidak ditemukan: {', '.join(map(str, result['missing_dates']))}"
+    if result.get('ambiguous_dates'):
+        line += f"\n   ⚠️ Kolom tanggal ambigu: {', '.join(map(str, result['ambiguous_dates']))}"
+    if result.get('skipped_files'):
+        line += f"\n   ⚠️ File di --date-dir tanpa penanda tanggal yang jelas atau tanggal ganda (dilewati): {', '.join(result['skipped_files'])}"
+    for name, unpatched in result.get('unpatched_dates', {}).items():
+        line += (f"\n   ⚠️ {name}: tanggal {', '.join(map(str, unpatched))} tidak ditulis ke template "
+                 "(kolom tidak ditemukan atau ganda di baris header sheet)")
+    if result.get('changes') is not None:
+        line += "\n   🔍 Perubahan dari hasil sebelumnya: " + ", ".join(f"{k}: {v}" for k, v in result['changes'].items())
+    for row in result.get('templates', []):
+        line += (f"\n   - {row['Template']}: Tanggal: {row['Tanggal']}, Baris: {row['Baris']}, "
+                 f"Cocok: {row['Data Cocok']}, Tidak Cocok: {row['Tidak Cocok']}")
+        if row['Tanggal Tidak Ada'] != "-":
+            line += f", Tanggal tidak ada: {row['Tanggal Tidak Ada']}"
+    return line
+
+
+def _header_row(value):
+    if value == AUTO_HEADER:
+        return value
+    try:
+        row = int(value)
+    except ValueError:
+        row = 0
+    if row < 1:
+        raise argparse.ArgumentTypeError(f"harus nomor baris (mulai 1) atau '{AUTO_HEADER}': {value}")
+    return row
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="crfill", description="Automated CR Filling (batch)")
+    parser.add_argument("--template", action="append",
+                        help="File template (.xlsx, .csv, .parquet); ulangi untuk banyak template, hasilnya ZIP")
+    parser.add_argument("--input", help="File input utama (.xlsx, .csv, .parquet)")
+    parser.add_argument("--dates", help="Tanggal yang diproses, mis. 1-31 atau 1,3,5")
+    parser.add_argument("--output", help="File hasil (.xlsx, atau .zip untuk banyak template)")
+    parser.add_argument("--date-dir",
+                        help="Folder file input per tanggal (day_07.xlsx, tgl-7.csv atau input_2025-01-07.xlsx)")
+    parser.add_argument("--date-input", action="append", default=[], metavar="TANGGAL=FILE",
+                        help="File input khusus untuk satu tanggal (boleh diulang)")
+    parser.add_argument("--header-row", type=_header_row, default=AUTO_HEADER,
+                        help="Nomor baris header di file xlsx/csv, atau 'auto' (default) untuk mencari baris 'Crew ID'")
+    parser.add_argument("--cache-dir", help="Folder cache Parquet untuk hasil parsing xlsx")
+    parser.add_argument("--store", help="File SQLite Roster Store; roster diisi dari semua tanggal tersimpan")
+    parser.add_argument("--period", help="Periode roster di store, mis. 2025-01 (wajib dengan --store)")
+    parser.add_argument("--no-format", action="store_true", help="Tanpa format warna dan style")
+    parser.add_argument("--patch-template", action="store_true",
+                        help="Tulis hanya sel tanggal ke salinan template asli (format, formula, sheet lain tetap)")
+    parser.add_argument("--previous", help="File hasil sebelumnya; sel yang berubah dilaporkan dan diwarnai")
+    parser.add_argument("--duplicate-policy", choices=list(DUPLICATE_POLICIES), default="first",
+                        help="Baris yang dipakai jika Crew ID input duplikat")
+    parser.add_argument("--manifest", help="File JSON berisi banyak job")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses paralel")
+    parser.add_argument("--stats-json", help="Simpan ringkasan statistik semua job ke file JSON")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.manifest:
+        jobs = load_manifest(args.manifest)
+    else:
+        missing = [opt for opt in ("template", "input", "dates", "output") if not getattr(args, opt)]
+        if missing:
+            parser.error("argumen wajib tanpa --manifest: " + ", ".join("--" + m for m in missing))
+        if args.store and not args.period:
+            parser.error("--period wajib jika memakai --store")
+        if args.previous and len(args.template) > 1:
+            parser.error("--previous hanya bisa dipakai dengan satu --template")
+        date_inputs = {}
+        for item in args.date_input:
+            date, _, path = item.partition("=")
+            if not path:
+                parser.error(f"format --date-input harus TANGGAL=FILE: {item}")
+            date_inputs[date] = path
+        jobs = [{
+            'templates': args.template,
+            'input': args.input,
+            'dates': args.dates,
+            'output': args.output,
+            'date_dir': args.date_dir,
+            'date_inputs': date_inputs,
+            'apply_formatting': not args.no_format,
+            'duplicate_policy': args.duplicate_policy,
+            'output_mode': "patch" if args.patch_template else "report",
+            'header_row': args.header_row,
+            'cache_dir': args.cache_dir,
+            'store': args.store,
+            'period': args.period,
+            'previous': args.previous,
+        }]
+
+    results = run_jobs(jobs, workers=args.workers)
+    for result in results:
+        print(format_summary(result))
+
+    if args.stats_json:
+        with open(args.stats_json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+
+    return 1 if any('error' in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Perbandingan per sel antara dua Collective Roster hasil fill (mis. kemarin vs hari ini).
+
+Baris dipasangkan lewat Crew ID ternormalisasi dan kolom lewat angka tanggal,
+lalu setiap kolom tanggal dibandingkan sebagai satu array. Nilai unik per kolom
+dinormalisasi sekali (lewat factorize), sehingga biaya total linear terhadap
+jumlah sel dan cukup ringan untuk dijalankan di setiap proses.
+"""
+import numpy as np
+import pandas as pd
+
+from crfill.engine import CREW_ID_COL, EMPTY_MARK, DayColumnIndex, match_crew_rows
+
+CHANGE_KINDS = {
+    "changed": "Diubah",
+    "added": "Ditambah",
+    "cleared": "Dihapus",
+}
+DIFF_COLUMNS = [CREW_ID_COL, "Baris", "Tanggal", "Perubahan", "Nilai Lama", "Nilai Baru"]
+
+
+def diff_rosters(previous_df, current_df, days=None):
+    """Daftar sel tanggal yang berbeda antara `previous_df` dan `current_df`.
+
+    Sel kosong (NaN, "" atau "-") dianggap sama; "12345" dan 12345.0 dianggap
+    sama. Perubahan "Ditambah" = kosong -> terisi, "Dihapus" = terisi -> kosong,
+    "Diubah" = nilai berbeda. Crew yang hanya ada di salah satu roster ikut
+    dilaporkan dengan sisi lainnya kosong. `Baris` adalah nomor baris data
+    (mulai 1) di `current_df`, kosong untuk crew yang sudah tidak ada.
+    Tanpa `days`, semua tanggal yang ada di salah satu roster dibandingkan.
+    Hasil urut per baris lalu per tanggal.
+    """
+    rows = match_crew_rows(previous_df[CREW_ID_COL], current_df[CREW_ID_COL], how="outer")
+    # Urutan baris roster baru, crew yang sudah tidak ada di akhir
+    rows = rows.assign(order=rows['right'].where(rows['right'] >= 0, len(current_df) + rows['left']))
+    rows = rows.sort_values('order', kind="stable")
+    prev_pos = rows['left'].to_numpy()
+    cur_pos = rows['right'].to_numpy()
+
+    prev_index = DayColumnIndex(previous_df.columns)
+    cur_index = DayColumnIndex(current_df.columns)
+    if days is None:
+        days = sorted(set(prev_index.columns) | set(cur_index.columns))
+
+    crew_ids = np.where(cur_pos >= 0, _take(current_df, CREW_ID_COL, cur_pos),
+                        _take(previous_df, CREW_ID_COL, prev_pos))
+    row_numbers = np.where(cur_pos >= 0, cur_pos + 1, None)
+
+    parts = []
+    for day in days:
+        old = _take(previous_df, prev_index.get(day), prev_pos)
+        new = _take(current_df, cur_index.get(day), cur_pos)
+        old_key = _comparable(old)
+        new_key = _comparable(new)
+        old_empty = pd.isna(old_key)
+        new_empty = pd.isna(new_key)
+        differs = (old_key != new_key) & ~(old_empty & new_empty)
+        if not differs.any():
+            continue
+        kinds = np.where(old_empty, CHANGE_KINDS["added"],
+                         np.where(new_empty, CHANGE_KINDS["cleared"], CHANGE_KINDS["changed"]))
+        selected = np.flatnonzero(differs)
+        parts.append(pd.DataFrame({
+            CREW_ID_COL: crew_ids[selected],
+            "Baris": row_numbers[selected],
+            "Tanggal": day,
+            "Perubahan": kinds[selected],
+            "Nilai Lama": old[selected],
+            "Nilai Baru": new[selected],
+            "_order": selected,
+        }))
+
+    if not parts:
+        return pd.DataFrame(columns=DIFF_COLUMNS)
+    diff = pd.concat(parts, ignore_index=True)
+    diff = diff.sort_values(["_order", "Tanggal"], kind="stable", ignore_index=True)
+    return diff[DIFF_COLUMNS]
+
+
+def change_counts(diff_df):
+    """Jumlah sel per jenis perubahan ({"Diubah": n, "Ditambah": n, "Dihapus": n})."""
+    counts = diff_df["Perubahan"].value_counts()
+    return {label: int(counts.get(label, 0)) for label in CHANGE_KINDS.values()}
+
+
+def _take(df, col, positions):
+    # Nilai kolom `col` pada `positions`; posisi -1, kolom yang tidak ada dan NaN -> None
+    values = np.full(len(positions), None, dtype=object)
+    if col is not None:
+        found = positions >= 0
+        values[found] = df[col].to_numpy(dtype=object)[positions[found]]
+        values[pd.isna(values)] = None
+    return values
+
+
+def _comparable(values):
+    # Bentuk pembanding: teks ternormalisasi, None untuk sel kosong
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    keys = np.array([_cell_key(v) for v in uniques] + [None], dtype=object)
+    return keys[codes]
+
+
+def _cell_key(value):
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return None if text in ("", EMPTY_MARK) else text
@@ -0,0 +1,498 @@
+"""Mesin pengisian Collective Roster tanpa ketergantungan pada Streamlit.
+
+Crew ID dinormalisasi sekali per file (CrewIndex), lalu dicocokkan ke template
+melalui hash index sehingga setiap kolom tanggal diisi dengan satu operasi take.
+"""
+import itertools
+import re
+from datetime import date as date_type
+
+import numpy as np
+import pandas as pd
+
+from crfill.profiling import RunProfile
+
+CREW_ID_COL = "Crew ID"
+EMPTY_MARK = "-"
+# `header=AUTO_HEADER`: baris header dicari dari sel "Crew ID" di beberapa baris awal file
+AUTO_HEADER = "auto"
+HEADER_SCAN_ROWS = 20
+
+
+def crew_header_position(rows, default=None):
+    """Posisi (mulai 0) baris pertama di `rows` yang memuat sel "Crew ID", atau `default`."""
+    for pos, row in enumerate(itertools.islice(rows, HEADER_SCAN_ROWS)):
+        if any(value is not None and str(value).strip() == CREW_ID_COL for value in row):
+            return pos
+    return default
+
+
+def normalize_crew_ids(values):
+    """Normalisasi Crew ID: spasi dibuang, "12345.0" -> "12345", "012345" -> "12345".
+
+    ID kosong menjadi NaN sehingga tidak pernah dianggap cocok.
+    """
+    ids = values.astype(object).map(str, na_action="ignore")
+    if ids.isna().all():
+        # Tanpa satu pun string (mis. kolom Crew ID kosong bertipe float) aksesor .str tidak bisa dipakai
+        return ids
+    ids = ids.str.strip()
+    ids = ids.str.replace(r"^(\d+)\.0*$", r"\1", regex=True)
+    ids = ids.str.replace(r"^0+(?=\d)", "", regex=True)
+    return ids.mask(ids == "")
+
+
+def value_keys(values):
+    """Bentuk teks pembanding isi sel: 123, 123.0, "123" dan " 123" sama-sama "123".
+
+    NaN/None tetap None. Dipakai agar deteksi konflik dan laporan konflik
+    menganggap nilai yang sama dengan cara yang sama.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    keys = np.array([_value_key(v) for v in uniques] + [None], dtype=object)
+    return keys[codes]
+
+
+def _value_key(value):
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+DUPLICATE_POLICIES = {
+    "first": "Baris pertama",
+    "last": "Baris terakhir",
+    "non_empty": "Utamakan yang tidak kosong",
+    "conflict": "Tandai konflik",
+}
+CONFLICT_MARK = "KONFLIK"
+
+
+class CrewIndex:
+    """Index Crew ID ternormalisasi dari satu file, dipakai bersama oleh validasi dan fill.
+
+    Setiap ID unik mendapat kode (urutan kemunculan pertama); baris pertama,
+    baris terakhir dan jumlah baris per kode disimpan untuk kebijakan duplikat.
+    """
+
+    def __init__(self, crew_ids):
+        keys = normalize_crew_ids(pd.Series(crew_ids, dtype=object))
+        self.keys = keys.to_numpy(dtype=object)
+        self.codes, uniques = pd.factorize(keys, use_na_sentinel=True)
+        self.unique_ids = pd.Index(uniques, dtype=object)
+
+        valid = self.codes >= 0
+        rows = np.flatnonzero(valid)
+        valid_codes = self.codes[valid]
+        self.counts = np.bincount(valid_codes, minlength=len(uniques))
+        self.first_rows = _first_positions(valid_codes, rows, len(uniques))
+        self.last_rows = _first_positions(valid_codes[::-1], rows[::-1], len(uniques))
+
+    @classmethod
+    def from_frame(cls, df):
+        if CREW_ID_COL not in df.columns:
+            return cls([])
+        return cls(df[CREW_ID_COL])
+
+    def __len__(self):
+        return len(self.unique_ids)
+
+    @property
+    def has_duplicates(self):
+        return bool((self.counts > 1).any())
+
+    @property
+    def duplicated_ids(self):
+        return self.unique_ids[self.counts > 1]
+
+    def lookup(self, keys):
+        """Kode ID untuk setiap key (-1 jika tidak ada)."""
+        return self.unique_ids.get_indexer(keys)
+
+    def positions(self, keys, policy="first", values=None):
+        """Posisi baris input untuk setiap key (-1 jika tidak ada)."""
+        return self.resolve(self.lookup(keys), policy, values)[0]
+
+    def resolve(self, codes, policy="first", values=None):
+        """Pilih baris input per kode sesuai kebijakan duplikat.
+
+        `values` adalah isi kolom tanggal input (dipakai oleh "non_empty" dan
+        deteksi konflik). Mengembalikan (positions, conflicts) sepanjang `codes`.
+        """
+        if policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"Kebijakan duplikat tidak dikenal: {policy}")
+        found = codes >= 0
+        conflicts = np.zeros(len(codes), dtype=bool)
+        if not len(self.unique_ids):
+            return np.full(len(codes), -1), conflicts
+
+        rows = self.last_rows if policy == "last" else self.first_rows
+        if values is not None and self.has_duplicates:
+            notna = pd.notna(values)
+            if policy == "non_empty":
+                rows = self._first_rows_where(notna)
+            conflicts = found & self.conflicting_codes(values, notna)[np.maximum(codes, 0)]
+
+        return np.where(found, rows[np.maximum(codes, 0)], -1), conflicts
+
+    def conflicting_codes(self, values, notna=None):
+        """Boolean per kode: ID duplikat dengan lebih dari satu nilai tidak kosong yang berbeda."""
+        notna = pd.notna(values) if notna is None else notna
+        mask = (self.codes >= 0) & notna
+        mask &= self.counts[np.maximum(self.codes, 0)] > 1
+        pairs = pd.DataFrame({'code': self.codes[mask], 'value': value_keys(values[mask])}).drop_duplicates()
+        return np.bincount(pairs['code'].to_numpy(), minlength=len(self.unique_ids)) > 1
+
+    def _first_rows_where(self, mask):
+        hit = np.flatnonzero(mask & (self.codes >= 0))
+        rows = _first_positions(self.codes[hit], hit, len(self.unique_ids))
+        return np.where(rows >= 0, rows, self.first_rows)
+
+    def matched(self, other):
+        return self.unique_ids.intersection(other.unique_ids)
+
+    def missing_in(self, other):
+        """ID di index ini yang tidak ada di `other`."""
+        return self.unique_ids.difference(other.unique_ids, sort=False)
+
+
+def _first_positions(codes, positions, size):
+    # Posisi kemunculan pertama tiap kode (-1 jika tidak muncul). np.unique menjamin indeks
+    # kemunculan pertama; assignment dengan indeks berulang tidak menjamin urutan tulis.
+    result = np.full(size, -1)
+    present, first = np.unique(codes, return_index=True)
+    result[present] = positions[first]
+    return result
+
+
+class Roster:
+    """DataFrame hasil parsing beserta CrewIndex-nya (dibangun saat pertama dipakai)."""
+
+    def __init__(self, df):
+        self.df = df
+        self._crew_index = None
+        # Record RunProfile dari parsing asli, agar cache hit tetap bisa melaporkan biaya parsing
+        self.parse_record = None
+
+    @property
+    def crew_index(self):
+        if self._crew_index is None:
+            self._crew_index = CrewIndex.from_frame(self.df)
+        return self._crew_index
+
+
+def as_roster(value):
+    return value if isinstance(value, Roster) else Roster(value)
+
+
+def match_crew_rows(left_ids, right_ids, how="inner"):
+    """Pasangan posisi baris dua daftar Crew ID berdasarkan (ID ternormalisasi, kemunculan ke-n).
+
+    Crew ID duplikat dipasangkan menurut urutan kemunculannya; ID kosong tidak
+    pernah dipasangkan. Dengan `how="outer"` baris yang hanya ada di satu sisi
+    ikut dengan posisi -1 di sisi lainnya. Mengembalikan DataFrame berkolom
+    `left` dan `right`.
+    """
+    def occurrences(ids, side):
+        keys = normalize_crew_ids(pd.Series(ids, dtype=object))
+        frame = pd.DataFrame({'key': keys.to_numpy(), side: np.arange(len(keys))}).dropna(subset=['key'])
+        frame['nth'] = frame.groupby('key').cumcount()
+        return frame
+
+    rows = occurrences(left_ids, 'left').merge(occurrences(right_ids, 'right'), on=['key', 'nth'], how=how)
+    return rows[['left', 'right']].fillna(-1).astype(np.int64)
+
+
+MONTH_WORDS = {
+    "jan", "feb", "mar", "apr", "may", "mei", "jun", "jul", "aug", "agu", "agt", "ags",
+    "sep", "oct", "okt", "nov", "dec", "des",
+}
+DAY_WORDS = {
+    "mon", "tue", "wed", "thu", "fri", "sat", "sun",
+    "sen", "sel", "rab", "kam", "jum", "sab", "min",
+    "day", "tgl", "tanggal", "hari",
+}
+
+_DAY_ONLY = re.compile(r"^(\d{1,2})(?:\.0)?$")
+_DAY_WORD = re.compile(r"^(\d{1,2})[\s\-/.]*([a-z]+)\.?$")
+_WORD_DAY = re.compile(r"^([a-z]+)\.?[\s\-/.]*(\d{1,2})$")
+_ISO_DATE = re.compile(r"^\d{4}-\d{1,2}-(\d{1,2})(?:[ T].*)?$")
+_DMY_DATE = re.compile(r"^(\d{1,2})[/\-.]\d{1,2}[/\-.]\d{2,4}$")
+
+
+def _is_day_word(word):
+    return word[:3] in MONTH_WORDS or word in DAY_WORDS or word[:3] in DAY_WORDS
+
+
+def parse_day(col):
+    """Ambil angka tanggal (1-31) dari header kolom, atau None jika bukan kolom tanggal.
+
+    Mendukung header datetime, angka (1, 1.0), "01", "1-Jan", "1 Jan", "Jan 1",
+    "Tgl 1", "2025-01-07" dan "07/01/2025".
+    """
+    if isinstance(col, (bool, np.bool_)):
+        return None
+    if isinstance(col, (date_type, np.datetime64)):
+        day = pd.Timestamp(col).day
+    elif isinstance(col, (int, np.integer)):
+        day = int(col)
+    elif isinstance(col, (float, np.floating)):
+        day = int(col) if float(col).is_integer() else None
+    else:
+        text = str(col).strip().lower()
+        day = None
+        for pattern in (_DAY_ONLY, _ISO_DATE, _DMY_DATE):
+            match = pattern.match(text)
+            if match:
+                day = int(match.group(1))
+                break
+        else:
+            match = _DAY_WORD.match(text)
+            if match and _is_day_word(match.group(2)):
+                day = int(match.group(1))
+            match = _WORD_DAY.match(text)
+            if match and _is_day_word(match.group(1)):
+                day = int(match.group(2))
+
+    if day is None or not 1 <= day <= 31:
+        return None
+    return day
+
+
+class DayColumnIndex:
+    """Pemetaan tanggal -> kolom yang dibangun sekali dari header template."""
+
+    def __init__(self, columns):
+        found = {}
+        for col in columns:
+            day = parse_day(col)
+            if day is not None:
+                found.setdefault(day, []).append(col)
+        self.columns = {day: cols[0] for day, cols in found.items() if len(cols) == 1}
+        self.ambiguous = {day: cols for day, cols in found.items() if len(cols) > 1}
+
+    def get(self, day):
+        """Kolom untuk `day`, atau None jika tidak ditemukan / ambigu."""
+        return self.columns.get(day)
+
+    def missing(self, days):
+        return [day for day in days if day not in self.columns and day not in self.ambiguous]
+
+    def ambiguous_in(self, days):
+        return {day: self.ambiguous[day] for day in days if day in self.ambiguous}
+
+
+def resolve_input_column(input_df, date, date_col, input_index=None):
+    """Kolom input untuk tanggal: label yang sama dengan template, atau hasil parsing header input."""
+    if date_col in input_df.columns:
+        return date_col
+    input_index = input_index or DayColumnIndex(input_df.columns)
+    return input_index.get(date)
+
+
+def new_overall_stats(total_rows):
+    return {
+        'total_rows': total_rows,
+        'dates_processed': 0,
+        'total_matched': 0,
+        'total_not_matched': 0,
+        'total_empty': 0,
+        'total_conflicts': 0,
+        'date_details': {}
+    }
+
+
+def add_date_stats(overall_stats, date, stats):
+    overall_stats['date_details'][date] = stats
+    overall_stats['total_matched'] += stats['matched']
+    overall_stats['total_not_matched'] += stats['not_matched']
+    overall_stats['total_empty'] += stats['empty']
+    overall_stats['total_conflicts'] += stats.get('conflicts', 0)
+    overall_stats['dates_processed'] += 1
+
+
+def fill_date_column(template_df, date_col, source, positions, conflicts=None, flag_conflicts=False):
+    """Isi satu kolom tanggal di `template_df` dan kembalikan statistiknya.
+
+    `source` adalah array nilai kolom input (None jika kolom tidak ada),
+    `positions` baris input per baris template (-1 jika tidak cocok).
+    """
+    n = len(template_df)
+    matched_mask = positions >= 0
+    result = np.full(n, EMPTY_MARK, dtype=object)
+    has_value = np.zeros(n, dtype=bool)
+    if conflicts is None:
+        conflicts = np.zeros(n, dtype=bool)
+
+    if source is not None and matched_mask.any():
+        values = source[np.where(matched_mask, positions, 0)]
+        has_value = matched_mask & pd.notna(values)
+        result[has_value] = values[has_value]
+        if flag_conflicts:
+            result[conflicts] = CONFLICT_MARK
+            has_value |= conflicts
+
+    template_df[date_col] = pd.Series(result, index=template_df.index, dtype=object)
+    return _fill_stats(matched_mask, has_value, conflicts)
+
+
+def fill_date_codes(template_df, date_col, source_codes, positions, vocabulary, conflicts=None,
+                    flag_conflicts=False):
+    """Seperti `fill_date_column`, tetapi bekerja pada kode DutyVocabulary.
+
+    `source_codes` adalah kode kamus kolom input (-1 untuk kosong, None jika kolom
+    tidak ada); hasilnya kolom Categorical berkategori kamus.
+    """
+    n = len(template_df)
+    matched_mask = positions >= 0
+    result = np.full(n, vocabulary.code_of(EMPTY_MARK), dtype=np.int64)
+    has_value = np.zeros(n, dtype=bool)
+    if conflicts is None:
+        conflicts = np.zeros(n, dtype=bool)
+
+    if source_codes is not None and matched_mask.any():
+        picked = source_codes[np.where(matched_mask, positions, 0)]
+        has_value = matched_mask & (picked >= 0)
+        result[has_value] = picked[has_value]
+        if flag_conflicts:
+            result[conflicts] = vocabulary.code_of(CONFLICT_MARK)
+            has_value |= conflicts
+
+    template_df[date_col] = pd.Series(vocabulary.from_codes(result), index=template_df.index)
+    return _fill_stats(matched_mask, has_value, conflicts)
+
+
+def _fill_stats(matched_mask, has_value, conflicts):
+    matched = int(has_value.sum())
+    total_matched_ids = int(matched_mask.sum())
+    return {
+        'matched': matched,
+        'not_matched': len(matched_mask) - total_matched_ids,
+        'empty': total_matched_ids - matched,
+        'conflicts': int(conflicts.sum()),
+    }
+
+
+def fill_roster(template_df, selected_dates, default_input, date_inputs=None, on_date=None, day_index=None,
+                profile=None, template_index=None, duplicate_policy="first", vocabulary=None):
+    """Isi semua tanggal terpilih di `template_df` (in place).
+
+    `default_input` dan setiap nilai `date_inputs` berupa tuple (DataFrame atau Roster, nama file);
+    CrewIndex milik Roster dipakai ulang. `template_index` adalah CrewIndex template.
+    `day_index` adalah DayColumnIndex template; dibangun dari header jika tidak diberikan.
+    Tanggal yang kolomnya tidak ditemukan atau ambigu dilewati.
+    `duplicate_policy` menentukan baris mana yang dipakai bila Crew ID input
+    muncul lebih dari sekali (lihat DUPLICATE_POLICIES).
+    Dengan `vocabulary` (DutyVocabulary) kolom hasil disimpan sebagai Categorical kamus.
+    `on_date(idx, total, date)` dipanggil sebelum setiap tanggal diproses.
+    `profile` (RunProfile) menerima tahap `index_build` dan `fill` per tanggal.
+    Mengembalikan dict `overall_stats` dengan format yang sama seperti di app.
+    """
+    date_inputs = date_inputs or {}
+    profile = profile or RunProfile()
+    total_dates = len(selected_dates)
+    overall_stats = new_overall_stats(len(template_df))
+
+    with profile.stage("index_build", rows=len(template_df), source="template"):
+        day_index = day_index or DayColumnIndex(template_df.columns)
+        if template_index is None:
+            template_index = CrewIndex.from_frame(template_df)
+        template_keys = template_index.keys
+    # Kode kecocokan dan index tanggal cukup dihitung sekali per input
+    rosters = {}
+    codes_cache = {}
+    input_day_indexes = {}
+
+    for idx, date in enumerate(selected_dates):
+        if on_date is not None:
+            on_date(idx, total_dates, date)
+
+        input_value, file_name = date_inputs.get(date, default_input)
+
+        date_col = day_index.get(date)
+        if date_col is None:
+            continue
+
+        key = id(input_value)
+        if key not in codes_cache:
+            rosters[key] = as_roster(input_value)
+            with profile.stage("index_build", rows=len(rosters[key].df), source=file_name):
+                codes_cache[key] = rosters[key].crew_index.lookup(template_keys)
+        roster = rosters[key]
+        if date_col not in roster.df.columns and key not in input_day_indexes:
+            input_day_indexes[key] = DayColumnIndex(roster.df.columns)
+        input_col = resolve_input_column(roster.df, date, date_col, input_day_indexes.get(key))
+
+        flag_conflicts = duplicate_policy == "conflict"
+        with profile.stage("fill", rows=len(template_df), date=date):
+            if vocabulary is None:
+                source = roster.df[input_col].to_numpy(dtype=object) if input_col is not None else None
+                positions, conflicts = roster.crew_index.resolve(codes_cache[key], duplicate_policy, source)
+                stats = fill_date_column(template_df, date_col, source, positions, conflicts, flag_conflicts)
+            else:
+                source_codes = vocabulary.codes_for(roster.df[input_col]) if input_col is not None else None
+                # Nilai asli (bukan kode) agar deteksi konflik menormalisasi teks sama seperti tanpa kamus
+                values = roster.df[input_col].to_numpy(dtype=object) if input_col is not None else None
+                positions, conflicts = roster.crew_index.resolve(codes_cache[key], duplicate_policy, values)
+                stats = fill_date_codes(template_df, date_col, source_codes, positions, vocabulary, conflicts,
+                                        flag_conflicts)
+        stats['file_used'] = file_name
+        add_date_stats(overall_stats, date, stats)
+
+    return overall_stats
+
+
+def conflict_report(default_input, date_inputs, selected_dates, day_index):
+    """Laporan Crew ID duplikat dengan nilai berbeda, per tanggal dan file input.
+
+    Argumen input sama dengan `fill_roster`. Kolom hasil: Crew ID, Tanggal,
+    Jumlah Baris, Nilai Berbeda, File Input.
+    """
+    date_inputs = date_inputs or {}
+    dates_by_input = {}
+    for date in selected_dates:
+        if day_index.get(date) is None:
+            continue
+        input_value, file_name = date_inputs.get(date, default_input)
+        dates_by_input.setdefault(id(input_value), (input_value, file_name, []))[2].append(date)
+
+    frames = []
+    for input_value, file_name, dates in dates_by_input.values():
+        roster = as_roster(input_value)
+        crew_index = roster.crew_index
+        if not crew_index.has_duplicates:
+            continue
+        input_index = DayColumnIndex(roster.df.columns)
+        columns = {}
+        for date in dates:
+            col = resolve_input_column(roster.df, date, day_index.get(date), input_index)
+            if col is not None:
+                columns[date] = col
+        if not columns:
+            continue
+
+        dup_rows = np.flatnonzero((crew_index.codes >= 0) & (crew_index.counts[np.maximum(crew_index.codes, 0)] > 1))
+        wide = pd.DataFrame({date: roster.df[col].to_numpy(dtype=object)[dup_rows] for date, col in columns.items()})
+        wide.insert(0, "code", crew_index.codes[dup_rows])
+        long = wide.melt(id_vars="code", var_name="Tanggal", value_name="Nilai").dropna(subset=["Nilai"])
+        long["Nilai"] = value_keys(long["Nilai"].to_numpy())
+        long = long.drop_duplicates()
+
+        sizes = long.groupby(["code", "Tanggal"], sort=False)["Nilai"].transform("size")
+        conflicting = long[sizes.to_numpy() > 1]
+        if conflicting.empty:
+            continue
+        report = (conflicting.groupby(["code", "Tanggal"], sort=True)["Nilai"]
+                  .agg(lambda values: " | ".join(sorted(values))).reset_index())
+        codes = report["code"].to_numpy()
+        frames.append(pd.DataFrame({
+            'Crew ID': crew_index.unique_ids[codes],
+            'Tanggal': report["Tanggal"].to_numpy(),
+            'Jumlah Baris': crew_index.counts[codes],
+            'Nilai Berbeda': report["Nilai"].to_numpy(),
+            'File Input': file_name,
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=['Crew ID', 'Tanggal', 'Jumlah Baris', 'Nilai Berbeda', 'File Input'])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,247 @@
+"""Ekspor hasil Collective Roster ke Excel dengan workbook write-only (streaming)."""
+import zipfile
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import MergedCell, WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.dataframe import dataframe_to_rows
+
+from crfill.diff import CHANGE_KINDS
+from crfill.engine import (
+    AUTO_HEADER,
+    CREW_ID_COL,
+    HEADER_SCAN_ROWS,
+    DayColumnIndex,
+    crew_header_position,
+    match_crew_rows,
+    parse_day,
+)
+from crfill.profiling import RunProfile
+from crfill.reader import _read_bytes
+
+REPORT_TITLE = "OPS - REPORT"
+SHEET_TITLE = "Sheet1"
+MAX_COLUMN_WIDTH = 50
+# Warna sel yang berubah dari hasil sebelumnya (mengikuti warna bawaan conditional formatting Excel)
+CHANGE_COLORS = {"changed": "FFEB9C", "added": "C6EFCE", "cleared": "FFC7CE"}
+
+
+def _title_style():
+    return NamedStyle(
+        name="cr_title",
+        font=Font(bold=True, size=14, color="FFFFFF"),
+        fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+        alignment=Alignment(horizontal="center", vertical="center"),
+    )
+
+
+def _header_style():
+    thin = Side(style='thin')
+    return NamedStyle(
+        name="cr_header",
+        font=Font(bold=True, color="FFFFFF"),
+        fill=PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid"),
+        alignment=Alignment(horizontal="center", vertical="center"),
+        border=Border(left=thin, right=thin, top=thin, bottom=thin),
+    )
+
+
+def _change_style(kind):
+    color = CHANGE_COLORS[kind]
+    return NamedStyle(name=f"cr_{kind}", fill=PatternFill(start_color=color, end_color=color, fill_type="solid"))
+
+
+def _max_str_length(values):
+    """Panjang string terpanjang; nilai non-string tidak dihitung (sama seperti auto-fit lama)."""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Cukup ukur kategori yang benar-benar dipakai
+        codes = np.unique(np.asarray(values.cat.codes))
+        values = pd.Series(values.cat.categories.take(codes[codes >= 0]), dtype=object)
+    if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+        return 0
+    if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "mixed", "mixed-integer", "empty"):
+        return 0  # kolom object tanpa string (mis. nomor baris)
+    lengths = values.str.len()
+    longest = lengths.max()
+    return 0 if pd.isna(longest) else int(longest)
+
+
+def compute_column_widths(df, title=REPORT_TITLE):
+    """Lebar kolom (karakter + 2, maks 50) dihitung langsung dari DataFrame."""
+    widths = []
+    for pos, col in enumerate(df.columns):
+        longest = max(_max_str_length(df.iloc[:, pos]), _max_str_length([col]))
+        if pos == 0 and title:
+            longest = max(longest, len(title))
+        widths.append(min(longest + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def build_report(df, apply_formatting=True, title=REPORT_TITLE, profile=None, extra_sheets=None, changes=None):
+    """Tulis `df` ke workbook baru dengan banner `title` dan kembalikan BytesIO siap unduh.
+
+    `extra_sheets` ({nama sheet: DataFrame}) ditulis sebagai sheet tambahan tanpa banner.
+    `changes` (hasil `diff_rosters` terhadap `df`) mewarnai sel yang berubah
+    dari hasil sebelumnya, juga tanpa `apply_formatting`.
+    `profile` (RunProfile) menerima tahap `width_fit`, `workbook_build` dan `save`.
+    """
+    profile = profile or RunProfile()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_TITLE)
+
+    highlights = _change_cells(df, changes) if changes is not None else {}
+    if highlights:
+        for kind in CHANGE_COLORS:
+            wb.add_named_style(_change_style(kind))
+
+    if apply_formatting:
+        wb.add_named_style(_title_style())
+        wb.add_named_style(_header_style())
+        # Lebar kolom harus ditentukan sebelum baris pertama ditulis
+        with profile.stage("width_fit", rows=len(df)):
+            for pos, width in enumerate(compute_column_widths(df, title), start=1):
+                ws.column_dimensions[get_column_letter(pos)].width = width
+
+    with profile.stage("workbook_build", rows=len(df)):
+        rows = dataframe_to_rows(df, index=False, header=True)
+
+        # Header
+        ws.append([_styled(ws, title, "cr_title" if apply_formatting else None)])
+        ws.append([_styled(ws, v, "cr_header" if apply_formatting else None) for v in next(rows)])
+
+        # Data; hanya baris yang berubah ditulis sebagai sel ber-style
+        for pos, row in enumerate(rows):
+            marks = highlights.get(pos)
+            if marks:
+                row = [_styled(ws, value, marks.get(col)) for col, value in enumerate(row)]
+            ws.append(row)
+
+        for sheet_name, sheet_df in (extra_sheets or {}).items():
+            _write_plain_sheet(wb, sheet_name, sheet_df, apply_formatting)
+
+    with profile.stage("save", rows=len(df)):
+        output = BytesIO()
+        wb.save(output)
+        output.seek(0)
+    return output
+
+
+def patch_template(source, result_df, dates, day_index, header=1, sheet_name=0, profile=None):
+    """Tulis sel tanggal terisi langsung ke workbook template asli.
+
+    Format, merged cell, formula, macro (.xlsm) dan sheet lain tidak disentuh.
+    Baris sheet dicocokkan ke `result_df` lewat Crew ID ternormalisasi
+    (kemunculan ke-n dengan kemunculan ke-n) dan kolom lewat angka tanggal di
+    baris header (`header=AUTO_HEADER`: baris pertama yang memuat sel "Crew ID").
+    Header berupa formula dibaca dari nilai tersimpannya. Mengembalikan
+    (BytesIO, jumlah sel yang ditulis, tanggal yang tidak bisa ditambal karena
+    kolomnya tidak ada atau ganda di baris header sheet).
+    """
+    profile = profile or RunProfile()
+
+    with profile.stage("workbook_load"):
+        data = _read_bytes(source)
+        wb = load_workbook(BytesIO(data), keep_vba=is_macro_workbook(data))
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        # Nilai tersimpan, agar header tanggal berupa formula (=B2+1) tetap terbaca sebagai tanggal
+        values_wb = load_workbook(BytesIO(data), read_only=True, data_only=True)
+        try:
+            values_ws = values_wb[ws.title]
+            scan_rows = HEADER_SCAN_ROWS if header == AUTO_HEADER else header + 1
+            head = list(values_ws.iter_rows(max_row=scan_rows, values_only=True))
+        finally:
+            values_wb.close()
+
+    if header == AUTO_HEADER:
+        header = crew_header_position(head, default=1)
+    header_row = header + 1
+
+    with profile.stage("patch", rows=len(result_df)) as record:
+        header_cells = head[header] if header < len(head) else ()
+        crew_col = None
+        sheet_days = {}
+        for pos, value in enumerate(header_cells, start=1):
+            if crew_col is None and value is not None and str(value).strip() == CREW_ID_COL:
+                crew_col = pos
+            day = parse_day(value) if value is not None else None
+            if day is not None:
+                sheet_days.setdefault(day, []).append(pos)
+        if crew_col is None:
+            raise ValueError(f"Kolom '{CREW_ID_COL}' tidak ditemukan di baris header template")
+
+        sheet_ids = [row[0] for row in ws.iter_rows(min_row=header_row + 1, min_col=crew_col, max_col=crew_col,
+                                                    values_only=True)]
+        row_map = match_crew_rows(sheet_ids, result_df[CREW_ID_COL])
+        sheet_rows = row_map['left'].to_numpy() + header_row + 1
+        df_rows = row_map['right'].to_numpy()
+
+        written = 0
+        unpatched = []
+        for date in dates:
+            target_cols = sheet_days.get(date)
+            date_col = day_index.get(date)
+            if date_col is None:
+                continue
+            if not target_cols or len(target_cols) > 1:
+                unpatched.append(date)
+                continue
+            values = result_df[date_col].to_numpy(dtype=object)[df_rows]
+            for sheet_row, value in zip(sheet_rows, values):
+                cell = ws.cell(row=int(sheet_row), column=target_cols[0])
+                if isinstance(cell, MergedCell):
+                    continue
+                cell.value = None if pd.isna(value) else value
+                written += 1
+        record['cells'] = written
+
+    with profile.stage("save", rows=len(result_df)):
+        output = BytesIO()
+        wb.save(output)
+        output.seek(0)
+    return output, written, unpatched
+
+
+def is_macro_workbook(data):
+    """True jika isi file (bytes) adalah workbook dengan macro VBA (.xlsm)."""
+    try:
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            return "xl/vbaProject.bin" in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+def _change_cells(df, changes):
+    # {posisi baris df: {posisi kolom: nama style}} untuk sel di `changes`
+    styles = {label: f"cr_{kind}" for kind, label in CHANGE_KINDS.items()}
+    day_index = DayColumnIndex(df.columns)
+    cells = {}
+    present = changes.dropna(subset=["Baris"])
+    for row, day, label in zip(present["Baris"], present["Tanggal"], present["Perubahan"]):
+        col = day_index.get(day)
+        if col is not None:
+            cells.setdefault(int(row) - 1, {})[df.columns.get_loc(col)] = styles[label]
+    return cells
+
+
+def _write_plain_sheet(wb, name, df, apply_formatting):
+    ws = wb.create_sheet(name)
+    if apply_formatting:
+        for pos, width in enumerate(compute_column_widths(df, title=None), start=1):
+            ws.column_dimensions[get_column_letter(pos)].width = width
+    rows = dataframe_to_rows(df, index=False, header=True)
+    ws.append([_styled(ws, v, "cr_header" if apply_formatting else None) for v in next(rows)])
+    for row in rows:
+        ws.append(row)
+
+
+def _styled(ws, value, style):
+    if style is None:
+        return value
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
@@ -0,0 +1,124 @@
+"""Satu input untuk banyak template: input diparse dan di-index sekali, template diisi paralel."""
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+from crfill.engine import DayColumnIndex, as_roster, fill_roster
+
+
+def fan_out(templates, selected_dates, default_input, date_inputs=None, duplicate_policy="first", vocabulary=None,
+            store=None, period=None, export=None, max_workers=None, on_template=None):
+    """Isi setiap template di `templates` ({nama: DataFrame atau Roster}) secara paralel.
+
+    `default_input` dan `date_inputs` sama seperti `fill_roster`; semuanya dibungkus
+    Roster dan CrewIndex-nya dibangun sekali sebelum worker mulai, sehingga setiap
+    template hanya menambah biaya lookup dan take. Dengan `store` (RosterStore),
+    template diisi dari semua tanggal `period` di store. `export(nama, result_df,
+    overall_stats, day_index)` dijalankan di worker yang sama dan hasilnya disimpan
+    sebagai `output`. `on_template(selesai, total, nama)` dipanggil di thread
+    pemanggil. Mengembalikan {nama: hasil}; error satu template dicatat di
+    `hasil['error']` tanpa menghentikan template lain.
+    """
+    default_input = _indexed(default_input)
+    date_inputs = {date: _indexed(value) for date, value in (date_inputs or {}).items()}
+
+    def run(name, template):
+        roster = as_roster(template)
+        result_df = roster.df.copy()
+        day_index = DayColumnIndex(result_df.columns)
+        if store is not None:
+            overall_stats = store.fill(result_df, period, store.days(period), day_index=day_index,
+                                       template_index=roster.crew_index)
+        else:
+            overall_stats = fill_roster(result_df, selected_dates, default_input, date_inputs, day_index=day_index,
+                                        template_index=roster.crew_index, duplicate_policy=duplicate_policy,
+                                        vocabulary=vocabulary)
+        result = {
+            'result_df': result_df,
+            'overall_stats': overall_stats,
+            'day_index': day_index,
+            'missing_dates': day_index.missing(selected_dates),
+        }
+        if export is not None:
+            result['output'] = export(name, result_df, overall_stats, day_index)
+        return result
+
+    results = {}
+    total = len(templates)
+    max_workers = min(max_workers or os.cpu_count() or 1, max(total, 1), 8)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crfill-fanout") as pool:
+        futures = {pool.submit(run, name, template): name for name, template in templates.items()}
+        for done, future in enumerate(as_completed(futures), start=1):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = {'error': e}
+            if on_template is not None:
+                on_template(done, total, name)
+    # Urutan hasil mengikuti urutan template, bukan urutan selesai
+    return {name: results[name] for name in templates}
+
+
+def template_stats(results):
+    """Ringkasan statistik per template untuk tampilan dan log."""
+    rows = []
+    for name, result in results.items():
+        if 'error' in result:
+            rows.append({'Template': name, 'Status': f"Gagal: {result['error']}"})
+            continue
+        stats = result['overall_stats']
+        rows.append({
+            'Template': name,
+            'Status': "OK",
+            'Baris': stats['total_rows'],
+            'Tanggal': stats['dates_processed'],
+            'Data Cocok': stats['total_matched'],
+            'Tidak Cocok': stats['total_not_matched'],
+            'Nilai Kosong': stats['total_empty'],
+            'Konflik': stats['total_conflicts'],
+            'Tanggal Tidak Ada': ", ".join(map(str, result['missing_dates'])) or "-",
+        })
+    return rows
+
+
+def unique_names(names):
+    """Nama unik dengan urutan tetap; nama yang sudah dipakai diberi akhiran _2, _3, ..."""
+    result = []
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        candidate, n = name, 1
+        while candidate in result:
+            n += 1
+            candidate = f"{stem}_{n}{ext}"
+        result.append(candidate)
+    return result
+
+
+def filled_names(names, extension=None):
+    """Nama file hasil per template ({nama: "<stem>_FILLED.xlsx"}), dijamin unik.
+
+    `extension(nama)` memberi ekstensi hasil (bawaan "xlsx"). Template dengan
+    stem sama (CR.xlsx dan CR.csv) mendapat akhiran _2, _3, ... seperti `unique_names`.
+    """
+    names = list(names)
+    outputs = [f"{os.path.splitext(name)[0]}_FILLED.{extension(name) if extension else 'xlsx'}" for name in names]
+    return dict(zip(names, unique_names(outputs)))
+
+
+def bundle_zip(files):
+    """ZIP berisi {nama file: bytes}; xlsx sudah terkompresi sehingga disimpan apa adanya."""
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    output.seek(0)
+    return output
+
+
+def _indexed(value):
+    # (DataFrame/Roster, nama, ...) -> Roster dengan CrewIndex yang sudah dibangun
+    roster = as_roster(value[0])
+    roster.crew_index
+    return (roster, value[1])
@@ -0,0 +1,82 @@
+"""Pengisian ulang inkremental: hanya tanggal yang input-nya berubah yang dihitung lagi."""
+from crfill.engine import DayColumnIndex, add_date_stats, fill_roster, new_overall_stats
+from crfill.profiling import RunProfile
+
+
+class FillCache:
+    """Kolom hasil fill terakhir per tanggal, berlaku untuk satu template.
+
+    Setiap entri disimpan dengan kunci input efektif tanggal tersebut (hash file
+    input utama atau file per tanggal), sehingga perubahan satu file hanya
+    membatalkan tanggal yang memakainya.
+    """
+
+    def __init__(self):
+        self.template_key = None
+        self.entries = {}
+
+    def reset(self, template_key):
+        self.template_key = template_key
+        self.entries = {}
+
+    def get(self, date, input_key):
+        entry = self.entries.get(date)
+        if entry is None or entry['input_key'] != input_key:
+            return None
+        return entry
+
+    def put(self, date, input_key, column, values, stats):
+        self.entries[date] = {'input_key': input_key, 'column': column, 'values': values, 'stats': stats}
+
+
+def fill_incremental(cache, template_df, template_key, selected_dates, default_input, date_inputs=None,
+                     day_index=None, on_date=None, profile=None, template_index=None, duplicate_policy="first",
+                     vocabulary=None):
+    """Isi salinan `template_df` dengan memakai ulang kolom dari `cache` bila masih valid.
+
+    `default_input` dan nilai `date_inputs` berupa tuple (DataFrame atau Roster, nama file, kunci input).
+    Hasil yang di-cache hanya berlaku untuk `duplicate_policy` yang sama.
+    Mengembalikan (result_df, overall_stats, reused_dates); `template_df` tidak diubah.
+    """
+    date_inputs = date_inputs or {}
+    profile = profile or RunProfile()
+    day_index = day_index or DayColumnIndex(template_df.columns)
+    cache_key = (template_key, duplicate_policy)
+    if cache.template_key != cache_key:
+        cache.reset(cache_key)
+
+    result_df = template_df.copy()
+    reused, stale = {}, []
+    for date in selected_dates:
+        _, file_name, input_key = date_inputs.get(date, default_input)
+        entry = cache.get(date, input_key)
+        if entry is not None:
+            result_df[entry['column']] = entry['values']
+            reused[date] = {**entry['stats'], 'file_used': file_name}
+        else:
+            stale.append(date)
+
+    fresh_stats = fill_roster(
+        result_df,
+        stale,
+        default_input[:2],
+        {date: value[:2] for date, value in date_inputs.items()},
+        on_date=on_date,
+        day_index=day_index,
+        profile=profile,
+        template_index=template_index,
+        duplicate_policy=duplicate_policy,
+        vocabulary=vocabulary
+    )
+    for date, stats in fresh_stats['date_details'].items():
+        column = day_index.get(date)
+        input_key = date_inputs.get(date, default_input)[2]
+        cache.put(date, input_key, column, result_df[column].copy(), stats)
+
+    overall_stats = new_overall_stats(len(template_df))
+    for date in selected_dates:
+        stats = reused.get(date) or fresh_stats['date_details'].get(date)
+        if stats is not None:
+            add_date_stats(overall_stats, date, stats)
+
+    return result_df, overall_stats, sorted(reused)
@@ -0,0 +1,119 @@
+"""Antrian job latar belakang agar proses berat tidak berjalan di thread script Streamlit."""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("CRFILL_MAX_JOBS", 2))
+DEFAULT_MAX_PENDING = int(os.environ.get("CRFILL_MAX_PENDING", 8))
+# Proses pembaca file per tanggal, dipakai bersama semua job di satu server
+DEFAULT_PARSE_WORKERS = int(os.environ.get("CRFILL_PARSE_WORKERS", min(os.cpu_count() or 1, 4)))
+FINISHED_TTL = 60 * 60  # detik; hasil job selesai disimpan selama ini
+
+
+class JobLimitError(RuntimeError):
+    """Antrian server penuh; job baru ditolak."""
+
+
+class Job:
+    """Satu proses yang dijalankan di worker pool.
+
+    `progress` (0-100) dan `message` diperbarui oleh worker lewat `report()`
+    dan dibaca oleh UI dengan polling. Setelah selesai, `result` atau `error` terisi.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "queued"
+        self.progress = 0
+        self.message = "Menunggu giliran..."
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "error")
+
+    def report(self, progress=None, message=None):
+        if progress is not None:
+            self.progress = max(0, min(100, int(progress)))
+        if message is not None:
+            self.message = message
+
+
+class JobManager:
+    """Worker pool terbatas yang dipakai bersama semua sesi di satu server.
+
+    Paling banyak `max_workers` job berjalan bersamaan; job berikutnya menunggu
+    di antrian sampai `max_pending` (berjalan + menunggu), selebihnya ditolak
+    dengan `JobLimitError`.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_pending=DEFAULT_MAX_PENDING, finished_ttl=FINISHED_TTL):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self.finished_ttl = finished_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crfill-job")
+        self._jobs = {}
+        # Reentrant: active() dipanggil dari dalam submit()
+        self._lock = threading.RLock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Jadwalkan `fn(job, *args, **kwargs)`; nilai kembaliannya menjadi `job.result`."""
+        with self._lock:
+            self._prune()
+            if len(self.active()) >= self.max_pending:
+                raise JobLimitError(f"Server sedang memproses {self.max_pending} job; coba lagi sebentar lagi")
+            job = Job()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def active(self):
+        """Job yang belum selesai (berjalan atau menunggu), urut waktu submit."""
+        # Dipanggil juga saat UI polling, sehingga hasil job kedaluwarsa ikut dibuang tanpa menunggu submit baru
+        with self._lock:
+            self._prune()
+            jobs = [job for job in self._jobs.values() if not job.finished]
+        return sorted(jobs, key=lambda job: job.submitted_at)
+
+    def queue_position(self, job):
+        """Posisi job di antrian (1 = berikutnya dijalankan), 0 jika sudah berjalan/selesai."""
+        if job.status != "queued":
+            return 0
+        queued = [j for j in self.active() if j.status == "queued"]
+        return queued.index(job) + 1 if job in queued else 0
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        job.started_at = time.time()
+        job.report(message="Memulai pemrosesan...")
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.report(100, "Selesai")
+            status = "done"
+        except Exception as e:
+            job.error = e
+            status = "error"
+        # finished_at diisi sebelum status agar job selesai selalu punya waktu selesai
+        job.finished_at = time.time()
+        job.status = status
+        with self._lock:
+            self._prune()
+
+    def _prune(self):
+        cutoff = time.time() - self.finished_ttl
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,48 @@
+"""Potongan data untuk preview: filter Crew ID, proyeksi kolom dan paging di sisi server."""
+import math
+
+from crfill.engine import CREW_ID_COL, normalize_crew_ids, parse_day
+
+
+def preview_columns(df, selected_dates=None):
+    """Kolom non-tanggal ditambah kolom tanggal terpilih, urutan asli dipertahankan.
+
+    Tanpa `selected_dates` semua kolom dikembalikan.
+    """
+    if not selected_dates:
+        return list(df.columns)
+    selected = set(selected_dates)
+    columns = []
+    for col in df.columns:
+        day = parse_day(col)
+        if day is None or day in selected:
+            columns.append(col)
+    return columns
+
+
+def filter_crew(df, query):
+    """Baris yang Crew ID-nya memuat `query` (tanpa beda huruf besar/kecil)."""
+    query = (query or "").strip()
+    if not query or CREW_ID_COL not in df.columns:
+        return df
+    ids = normalize_crew_ids(df[CREW_ID_COL])
+    return df[ids.str.contains(query, case=False, regex=False).to_numpy()]
+
+
+def page_count(n_rows, page_size):
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def page_slice(df, page, page_size):
+    """Halaman ke-`page` (mulai 1) beserta nomor baris awal/akhir (1-based)."""
+    start = (page - 1) * page_size
+    end = min(start + page_size, len(df))
+    return df.iloc[start:end], start + 1 if end > start else 0, end
+
+
+def summary_metrics(df):
+    """Ringkasan tanpa mengirim seluruh frame ke browser."""
+    metrics = {'rows': len(df), 'columns': len(df.columns)}
+    if CREW_ID_COL in df.columns:
+        metrics['unique_crew'] = int(df[CREW_ID_COL].nunique())
+    return metrics
@@ -0,0 +1,127 @@
+"""Instrumentasi per tahap (waktu, jumlah baris, memori) untuk satu kali proses."""
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# tracemalloc berlaku untuk seluruh proses, sedangkan job dari beberapa sesi bisa berjalan
+# bersamaan: tahap yang melacak memori dijalankan bergantian, dan tahap yang tumpang tindih
+# dengan tahap lain (dari RunProfile mana pun) ditandai karena puncaknya ikut menghitung alokasi lain
+_trace_lock = threading.Lock()
+_stage_lock = threading.Lock()
+_stage_count = {'running': 0, 'started': 0}
+
+
+def _enter_stage():
+    with _stage_lock:
+        _stage_count['running'] += 1
+        _stage_count['started'] += 1
+        return _stage_count['running'] > 1, _stage_count['started']
+
+
+def _exit_stage(started):
+    with _stage_lock:
+        _stage_count['running'] -= 1
+        return _stage_count['started'] != started
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS melaporkan byte
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class RunProfile:
+    """Kumpulan catatan tahap proses.
+
+    Tanpa opsi tambahan hanya mencatat waktu dan jumlah baris (murah).
+    `track_memory=True` memakai tracemalloc untuk puncak alokasi per tahap
+    (lebih lambat, hanya aktif selama tahap berjalan); `enable_cprofile=True` menyiapkan cProfile untuk
+    `start()` / `stop()`. Tahap tidak boleh bersarang saat melacak memori. Tahap yang
+    melacak memori dari beberapa RunProfile dijalankan bergantian; jika tahap lain
+    berjalan bersamaan, record diberi `peak_shared=True` karena puncaknya ikut
+    menghitung alokasi thread lain. `process_max_rss_mb` adalah puncak RSS seluruh
+    proses sejak dimulai (dicatat di akhir tahap), bukan pemakaian tahap itu sendiri.
+    """
+
+    def __init__(self, track_memory=False, enable_cprofile=False):
+        self.track_memory = track_memory
+        self.stages = []
+        self.profiler = cProfile.Profile() if enable_cprofile else None
+
+    @contextmanager
+    def stage(self, name, rows=None, **meta):
+        """Ukur satu tahap; `rows` dapat diubah lewat record yang di-yield."""
+        record = {'stage': name, 'rows': rows, **meta}
+        started_tracing = False
+        if self.track_memory:
+            _trace_lock.acquire()
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                started_tracing = True
+        overlapped, started = _enter_stage()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 6)
+            overlapped = _exit_stage(started) or overlapped
+            if self.track_memory:
+                record['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+                record['peak_shared'] = overlapped
+                if started_tracing:
+                    tracemalloc.stop()
+                _trace_lock.release()
+            record['process_max_rss_mb'] = _max_rss_mb()
+            self.stages.append(record)
+
+    def start(self):
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    @property
+    def total_seconds(self):
+        return round(sum(s['seconds'] for s in self.stages), 6)
+
+    def summary(self):
+        """Total waktu per nama tahap (tahap `fill` per tanggal dijumlahkan)."""
+        totals = {}
+        for s in self.stages:
+            totals[s['stage']] = round(totals.get(s['stage'], 0) + s['seconds'], 6)
+        return totals
+
+    def cprofile_text(self, limit=30, sort="cumulative"):
+        if self.profiler is None:
+            return ""
+        buffer = io.StringIO()
+        pstats.Stats(self.profiler, stream=buffer).sort_stats(sort).print_stats(limit)
+        return buffer.getvalue()
+
+    def to_dict(self, **extra):
+        return {
+            'total_seconds': self.total_seconds,
+            'summary': self.summary(),
+            'stages': self.stages,
+            **extra,
+        }
+
+    def to_json(self, **extra):
+        return json.dumps(self.to_dict(**extra), indent=2, default=str)
@@ -0,0 +1,330 @@
+"""Pembaca file roster dengan proyeksi kolom dan engine tercepat yang tersedia.
+
+Format file dipilih lewat registry `READERS` (xlsx, csv, parquet) berdasarkan
+ekstensi atau isi file. Untuk xlsx, urutan engine: calamine (jika
+`python-calamine` terpasang), lalu openpyxl read-only streaming yang hanya
+menyimpan kolom terpilih, lalu `pd.read_excel` biasa sebagai cadangan. Hasil
+parsing xlsx dapat disimpan sebagai Parquet di `cache_dir`.
+"""
+import csv
+import importlib.util
+import multiprocessing
+import os
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from io import BytesIO, StringIO
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from crfill.cache import ParquetCache, content_key
+from crfill.engine import AUTO_HEADER, CREW_ID_COL, HEADER_SCAN_ROWS, Roster, crew_header_position, parse_day
+
+ALL_DAYS = tuple(range(1, 32))
+HAS_CALAMINE = importlib.util.find_spec("python_calamine") is not None
+HAS_PARQUET = importlib.util.find_spec("pyarrow") is not None
+DEFAULT_CACHE_DIR = os.environ.get("CRFILL_CACHE_DIR", ".crfill_cache")
+# Baris header (indeks mulai 0) jika "Crew ID" tidak ditemukan: xlsx biasanya punya banner judul di baris 1
+DEFAULT_HEADERS = {"xlsx": 1, "csv": 0}
+
+# format -> fungsi pembaca(source, usecols, sheet_name, header, engine)
+READERS = {}
+# ekstensi (tanpa titik) -> format
+EXTENSIONS = {}
+
+
+def register_reader(fmt, *extensions):
+    """Daftarkan pembaca untuk format `fmt` dan ekstensi file-nya."""
+    def decorator(func):
+        READERS[fmt] = func
+        for ext in extensions:
+            EXTENSIONS[ext] = fmt
+        return func
+
+    return decorator
+
+
+def supported_extensions():
+    """Ekstensi yang bisa dibaca di lingkungan ini (untuk `st.file_uploader`)."""
+    return [ext for ext, fmt in EXTENSIONS.items() if fmt != "parquet" or HAS_PARQUET]
+
+
+def detect_format(source):
+    """Format file dari ekstensi nama/path, atau dari beberapa byte awal isinya."""
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", None)
+    if name:
+        ext = os.path.splitext(str(name))[1].lower().lstrip(".")
+        if ext in EXTENSIONS:
+            return EXTENSIONS[ext]
+
+    head = _peek(source, 4)
+    if head.startswith(b"PK"):
+        return "xlsx"
+    if head == b"PAR1":
+        return "parquet"
+    return "csv"
+
+
+def column_filter(days):
+    """Predikat kolom: "Crew ID" dan kolom yang header-nya salah satu `days`."""
+    days = set(days)
+
+    def keep(col):
+        return str(col).strip() == CREW_ID_COL or parse_day(col) in days
+
+    return keep
+
+
+def find_header_row(source, fmt=None, sheet_name=0):
+    """Indeks baris (mulai 0) yang memuat sel "Crew ID" di beberapa baris awal file.
+
+    Jika tidak ditemukan dipakai bawaan per format (`DEFAULT_HEADERS`), sehingga
+    template xlsx dengan banner dan CSV tanpa banner bisa dipakai bersama.
+    """
+    fmt = fmt or detect_format(source)
+    default = DEFAULT_HEADERS.get(fmt, 0)
+    if fmt == "csv":
+        text = _peek(source, 64 * 1024).decode("utf-8-sig", errors="ignore")
+        return crew_header_position(csv.reader(StringIO(text), delimiter=_sniff_delimiter(source)), default)
+    if fmt == "xlsx" and HAS_CALAMINE:
+        # Cukup baca beberapa baris awal; tidak perlu memuat seluruh workbook
+        rows = pd.read_excel(BytesIO(_read_bytes(source)), sheet_name=sheet_name, header=None,
+                             nrows=HEADER_SCAN_ROWS, engine="calamine")
+        rows = rows.astype(object).where(rows.notna(), None)
+        return crew_header_position(rows.itertuples(index=False), default)
+    if fmt == "xlsx":
+        wb = load_workbook(BytesIO(_read_bytes(source)), read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+            return crew_header_position(ws.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True), default)
+        finally:
+            wb.close()
+    return default
+
+
+def read_roster(source, days=None, sheet_name=0, header=1, engine=None, fmt=None, cache_dir=None):
+    """Baca file roster (header di baris ke-2) menjadi DataFrame.
+
+    `days=None` membaca semua kolom; jika diisi, hanya "Crew ID" dan kolom
+    tanggal tersebut yang dibaca. `fmt` memaksa format ("xlsx", "csv",
+    "parquet"); tanpa itu format ditebak dari ekstensi atau isi file. `engine`
+    memaksa engine xlsx tertentu ("calamine", "openpyxl-stream" atau engine
+    pandas lain). `header` (indeks baris header, atau `AUTO_HEADER` untuk
+    mencari baris "Crew ID") berlaku untuk xlsx dan csv; Parquet menyimpan
+    nama kolomnya sendiri. Dengan `cache_dir`, hasil parsing
+    xlsx disimpan sebagai Parquet dan dipakai lagi untuk isi file yang sama.
+    """
+    fmt = fmt or detect_format(source)
+    if fmt not in READERS:
+        raise ValueError(f"Format file tidak didukung: {fmt}")
+    usecols = column_filter(days) if days is not None else None
+
+    if fmt != "xlsx" or not (cache_dir and HAS_PARQUET):
+        if header == AUTO_HEADER:
+            header = find_header_row(source, fmt, sheet_name)
+        return READERS[fmt](source, usecols, sheet_name, header, engine)
+
+    data = _read_bytes(source)
+    cache = ParquetCache(cache_dir)
+    # Kunci memakai `header` apa adanya ("auto"), baris header dicari hanya saat cache miss
+    key = content_key(data, days=days, sheet_name=sheet_name, header=header)
+    df = cache.get(key)
+    if df is None:
+        if header == AUTO_HEADER:
+            header = find_header_row(BytesIO(data), fmt, sheet_name)
+        df = READERS[fmt](BytesIO(data), usecols, sheet_name, header, engine)
+        cache.put(key, df)
+    return df
+
+
+@register_reader("xlsx", "xlsx", "xlsm")
+def _read_xlsx(source, usecols, sheet_name, header, engine):
+    if engine is None:
+        if HAS_CALAMINE:
+            engine = "calamine"
+        elif usecols is not None:
+            engine = "openpyxl-stream"
+
+    if engine == "calamine":
+        try:
+            return pd.read_excel(source, sheet_name=sheet_name, header=header, usecols=usecols, engine="calamine")
+        except (ImportError, ValueError):
+            _rewind(source)
+    elif engine == "openpyxl-stream" and usecols is not None:
+        try:
+            return _read_openpyxl_stream(source, usecols, sheet_name, header)
+        except (TypeError, ValueError, KeyError, IndexError):
+            _rewind(source)
+        engine = None
+    elif engine == "openpyxl-stream":
+        engine = None
+
+    return pd.read_excel(source, sheet_name=sheet_name, header=header, usecols=usecols,
+                         engine=None if engine == "calamine" else engine)
+
+
+@register_reader("csv", "csv", "txt")
+def _read_csv(source, usecols, sheet_name, header, engine):
+    return pd.read_csv(source, header=header, usecols=usecols, sep=_sniff_delimiter(source))
+
+
+@register_reader("parquet", "parquet", "pq")
+def _read_parquet(source, usecols, sheet_name, header, engine):
+    columns = None
+    if usecols is not None:
+        import pyarrow.parquet as pq
+
+        names = pq.ParquetFile(source).schema_arrow.names
+        _rewind(source)
+        columns = [name for name in names if not name.startswith("__index_level_") and usecols(name)]
+    df = pd.read_parquet(source, columns=columns)
+    return df.reset_index(drop=True)
+
+
+def load_roster(source, vocabulary=None, **options):
+    """Seperti `read_roster`, tetapi dibungkus Roster agar CrewIndex ikut di-cache.
+
+    Dengan `vocabulary` (DutyVocabulary) kolom tanggal langsung disimpan ringkas.
+    """
+    return compact_roster(read_roster(source, **options), vocabulary)
+
+
+def compact_roster(df, vocabulary=None):
+    """Roster dari DataFrame; kolom tanggal di-encode ke `vocabulary` bila diberikan."""
+    if vocabulary is not None:
+        df = vocabulary.encode_frame(df, [col for col in df.columns if parse_day(col) is not None])
+    return Roster(df)
+
+
+def process_pool(max_workers=None):
+    """ProcessPoolExecutor dengan start method `spawn`.
+
+    Aman dibuat dari proses multi-thread (server Streamlit, thread job):
+    `fork` dapat membuat proses anak macet pada lock milik thread lain.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def read_many(sources, max_workers=None, use_processes=True, on_progress=None, executor=None, **options):
+    """Baca banyak file sekaligus di pool terbatas.
+
+    `sources` berupa dict {kunci: path atau bytes}. `on_progress(selesai, total, kunci)`
+    dipanggil di thread pemanggil setiap satu file selesai. Dengan `executor`,
+    file dibaca di pool milik pemanggil (mis. pool bersama satu server) dan
+    `max_workers`/`use_processes` diabaikan. Mengembalikan tuple (frames,
+    errors); error satu file tidak menghentikan file lain. Jika pool rusak
+    (proses anak mati), semua file yang terdampak dicatat dengan error
+    `BrokenExecutor` sehingga pemanggil bisa membuat pool baru.
+    """
+    frames, errors = {}, {}
+    total = len(sources)
+    if not total:
+        return frames, errors
+
+    if executor is None:
+        max_workers = min(max_workers or os.cpu_count() or 1, total, 8)
+        pool = process_pool(max_workers) if use_processes and max_workers > 1 else ThreadPoolExecutor(max_workers)
+        with pool:
+            return read_many(sources, on_progress=on_progress, executor=pool, **options)
+
+    futures = {}
+    for key, source in sources.items():
+        try:
+            futures[executor.submit(_read_one, source, options)] = key
+        except BrokenExecutor as e:
+            errors[key] = e
+    for done, future in enumerate(as_completed(futures), start=len(errors) + 1):
+        key = futures[future]
+        try:
+            frames[key] = future.result()
+        except Exception as e:
+            errors[key] = e
+        if on_progress is not None:
+            on_progress(done, total, key)
+    return frames, errors
+
+
+def _read_one(source, options):
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    return read_roster(source, **options)
+
+
+def _read_openpyxl_stream(source, usecols, sheet_name, header):
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        rows = ws.iter_rows(values_only=True)
+
+        for _ in range(header):
+            next(rows, None)
+        header_row = [_convert(v) for v in next(rows, ())]
+        names = _column_names(header_row)
+        keep = [i for i, name in enumerate(names) if usecols(name)]
+
+        data = []
+        for row in rows:
+            values = [_convert(row[i]) if i < len(row) else None for i in keep]
+            if any(v is not None for v in values):
+                data.append(values)
+    finally:
+        wb.close()
+
+    return pd.DataFrame(data, columns=[names[i] for i in keep])
+
+
+def _column_names(header_row):
+    # Penamaan mengikuti pandas: "Unnamed: n" untuk header kosong, "X.1" untuk duplikat
+    names, seen = [], {}
+    for i, value in enumerate(header_row):
+        name = f"Unnamed: {i}" if value is None or value == "" else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _convert(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _sniff_delimiter(source):
+    # Ekspor CSV dari Excel berlokal Indonesia memakai ";" sebagai pemisah
+    sample = _peek(source, 64 * 1024).decode("utf-8", errors="ignore")
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def _peek(source, size):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source[:size])
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read(size)
+    position = source.tell()
+    head = source.read(size)
+    source.seek(position)
+    return head
+
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    _rewind(source)
+    data = source.read()
+    _rewind(source)
+    return data
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
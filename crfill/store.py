@@ -0,0 +1,229 @@
+"""Penyimpanan roster di SQLite: satu baris per (periode, Crew ID, tanggal).
+
+Setiap input yang diproses di-upsert per tanggal beserta nama file sumbernya,
+sehingga operasi harian cukup memasukkan tanggal yang baru. Collective Roster
+lalu dibentuk dengan query ke store, bukan dengan memproses ulang semua file.
+Nilai yang tergantikan oleh ingest berikutnya dipindah ke `duty_history`,
+sehingga riwayat file mana yang mengisi setiap sel tetap bisa ditelusuri.
+"""
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from crfill.engine import (
+    CONFLICT_MARK,
+    CrewIndex,
+    DayColumnIndex,
+    add_date_stats,
+    as_roster,
+    fill_date_column,
+    new_overall_stats,
+    normalize_crew_ids,
+    resolve_input_column,
+)
+from crfill.profiling import RunProfile
+
+DEFAULT_STORE_PATH = os.environ.get("CRFILL_STORE", "crfill_store.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS duty (
+    period TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    crew_id TEXT NOT NULL,
+    value,
+    conflict INTEGER NOT NULL DEFAULT 0,
+    source_file TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (period, day, crew_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS duty_crew ON duty (period, crew_id, day);
+CREATE TABLE IF NOT EXISTS duty_history (
+    period TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    crew_id TEXT NOT NULL,
+    value,
+    conflict INTEGER NOT NULL,
+    source_file TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    superseded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS duty_history_crew ON duty_history (period, crew_id, day);
+CREATE TABLE IF NOT EXISTS ingest_log (
+    period TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    source_file TEXT NOT NULL,
+    input_key TEXT,
+    duplicate_policy TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ingest_log_day ON ingest_log (period, day, ingested_at);
+"""
+
+
+class RosterStore:
+    """Roster per periode (mis. "2025-01") dalam satu file SQLite.
+
+    Koneksi dibuka per operasi sehingga objek ini aman dipakai dari thread job
+    maupun proses lain.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def ingest(self, period, input_value, days, source_file, input_key=None, duplicate_policy="first"):
+        """Upsert nilai tanggal `days` dari satu input (DataFrame atau Roster).
+
+        Isi tanggal tersebut untuk `period` diganti seluruhnya oleh input ini
+        (Crew ID yang tidak ada lagi di input ikut terhapus) dan isi lamanya
+        dipindah ke `duty_history`;
+        Crew ID duplikat diselesaikan dengan `duplicate_policy` seperti saat fill.
+        Tanggal yang kolomnya tidak ada di input dilewati. Mengembalikan
+        {tanggal: jumlah baris}.
+        """
+        roster = as_roster(input_value)
+        crew_index = roster.crew_index
+        input_index = DayColumnIndex(roster.df.columns)
+        all_codes = np.arange(len(crew_index))
+        crew_ids = np.asarray(crew_index.unique_ids, dtype=object)
+        now = datetime.now().isoformat(timespec="seconds")
+
+        written = {}
+        with closing(self._connect()) as conn, conn:
+            for day in days:
+                col = resolve_input_column(roster.df, day, None, input_index)
+                if col is None:
+                    continue
+                source = roster.df[col].to_numpy(dtype=object)
+                positions, conflicts = crew_index.resolve(all_codes, duplicate_policy, source)
+                values = source[positions]
+                if duplicate_policy == "conflict":
+                    values[conflicts] = CONFLICT_MARK
+                conn.execute(
+                    "INSERT INTO duty_history (period, day, crew_id, value, conflict, source_file, updated_at, "
+                    "superseded_at) SELECT period, day, crew_id, value, conflict, source_file, updated_at, ? "
+                    "FROM duty WHERE period = ? AND day = ?",
+                    (now, period, day)
+                )
+                conn.execute("DELETE FROM duty WHERE period = ? AND day = ?", (period, day))
+                conn.executemany(
+                    "INSERT INTO duty (period, day, crew_id, value, conflict, source_file, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((period, day, crew_id, _to_sql(value), int(conflict), source_file, now)
+                     for crew_id, value, conflict in zip(crew_ids, values, conflicts))
+                )
+                conn.execute(
+                    "INSERT INTO ingest_log (period, day, source_file, input_key, duplicate_policy, rows, ingested_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (period, day, source_file, input_key, duplicate_policy, len(crew_ids), now)
+                )
+                written[day] = len(crew_ids)
+        return written
+
+    def is_current(self, period, day, input_key, duplicate_policy="first"):
+        """True jika ingest terakhir tanggal ini berasal dari input dan kebijakan yang sama."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT input_key, duplicate_policy FROM ingest_log WHERE period = ? AND day = ? "
+                "ORDER BY ingested_at DESC, rowid DESC LIMIT 1",
+                (period, day)
+            ).fetchone()
+        return row is not None and input_key is not None and row == (input_key, duplicate_policy)
+
+    def days(self, period):
+        """Tanggal yang sudah terisi untuk `period`."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT DISTINCT day FROM duty WHERE period = ? ORDER BY day", (period,)).fetchall()
+        return [day for (day,) in rows]
+
+    def ingest_history(self, period):
+        """Riwayat ingest `period` (terbaru di atas): tanggal, file sumber, jumlah baris, waktu."""
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(
+                "SELECT day AS Tanggal, source_file AS 'File Input', duplicate_policy AS 'Kebijakan Duplikat', "
+                "rows AS 'Jumlah Crew', ingested_at AS 'Waktu Ingest' FROM ingest_log WHERE period = ? "
+                "ORDER BY ingested_at DESC, rowid DESC",
+                conn, params=(period,)
+            )
+
+    def crew_history(self, period, crew_id):
+        """Semua nilai yang pernah mengisi sel satu Crew ID, per tanggal (terbaru di atas).
+
+        Kolom `Diganti` kosong untuk nilai yang berlaku sekarang, dan berisi
+        waktu ingest penggantinya untuk nilai lama. `crew_id` dinormalisasi
+        seperti saat fill.
+        """
+        crew_id = normalize_crew_ids(pd.Series([crew_id], dtype=object)).iloc[0]
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(
+                "SELECT day AS Tanggal, value AS Nilai, source_file AS 'File Input', updated_at AS Diperbarui, "
+                "superseded_at AS Diganti FROM ("
+                "SELECT day, value, source_file, updated_at, NULL AS superseded_at FROM duty "
+                "WHERE period = ? AND crew_id = ? "
+                "UNION ALL SELECT day, value, source_file, updated_at, superseded_at FROM duty_history "
+                "WHERE period = ? AND crew_id = ?"
+                ") ORDER BY day, superseded_at IS NOT NULL, superseded_at DESC, updated_at DESC",
+                conn, params=(period, crew_id, period, crew_id)
+            )
+
+    def fill(self, template_df, period, days, day_index=None, template_index=None, profile=None):
+        """Isi kolom tanggal `template_df` (in place) dari store dengan satu query per periode.
+
+        Hasil dan `overall_stats` sama formatnya dengan `fill_roster`; kolom
+        `file_used` berisi file sumber yang tersimpan. Tanggal tanpa data di
+        store atau tanpa kolom di template dilewati.
+        """
+        profile = profile or RunProfile()
+        day_index = day_index or DayColumnIndex(template_df.columns)
+        if template_index is None:
+            template_index = CrewIndex.from_frame(template_df)
+        days = [day for day in days if day_index.get(day) is not None]
+        overall_stats = new_overall_stats(len(template_df))
+        if not days:
+            return overall_stats
+
+        with profile.stage("store_query", period=period) as record:
+            with closing(self._connect()) as conn:
+                # Diambil sebagai tuple agar tipe nilai (int/str) tidak diubah pandas
+                rows = conn.execute(
+                    f"SELECT day, crew_id, value, conflict, source_file FROM duty WHERE period = ? "
+                    f"AND day IN ({', '.join('?' * len(days))}) ORDER BY day",
+                    (period, *days)
+                ).fetchall()
+            record['rows'] = len(rows)
+
+        stored = np.array(rows, dtype=object).reshape(-1, 5)
+        day_values = stored[:, 0].astype(np.int64)
+        for day in days:
+            selected = day_values == day
+            if not selected.any():
+                continue
+            crew_ids, values, conflicts, sources = (stored[selected, i] for i in range(1, 5))
+            with profile.stage("fill", rows=len(template_df), date=day):
+                positions = pd.Index(crew_ids).get_indexer(template_index.keys)
+                conflicts = (positions >= 0) & conflicts.astype(bool)[np.maximum(positions, 0)]
+                stats = fill_date_column(template_df, day_index.get(day), values, positions, conflicts)
+            stats['file_used'] = ", ".join(pd.unique(sources))
+            add_date_stats(overall_stats, day, stats)
+        return overall_stats
+
+
+def _to_sql(value):
+    # SQLite menyimpan int/float/str apa adanya; nilai lain disimpan sebagai teks
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
@@ -0,0 +1,75 @@
+"""Kamus kode tugas (OFF, SBY, nomor penerbangan, kode cuti) yang dipakai bersama.
+
+Kolom tanggal disimpan sebagai Categorical dengan kategori dari kamus ini.
+Kamus hanya bertambah (append-only), sehingga kode lama tetap berlaku dan
+kolom dari tanggal atau file berbeda bisa dibandingkan langsung lewat kodenya.
+Konversi kembali ke string baru terjadi saat ekspor.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class DutyVocabulary:
+    """Kamus nilai -> kode integer, dibagi antar tanggal dan file dalam satu sesi."""
+
+    def __init__(self):
+        self._codes = {}
+        self._values = []
+        self._categories = pd.Index([], dtype=object)
+        # Job latar belakang dan thread script dapat menambah kamus bersamaan
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def categories(self):
+        if len(self._categories) != len(self._values):
+            self._categories = pd.Index(self._values, dtype=object)
+        return self._categories
+
+    def code_of(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    # Nilai ditambahkan sebelum kodenya terlihat oleh thread lain
+                    self._values.append(value)
+                    code = self._codes[value] = len(self._values) - 1
+        return code
+
+    def encode(self, values):
+        """Ubah nilai menjadi Categorical dengan kategori kamus (NaN tetap kosong)."""
+        local_codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        mapping = np.array([self.code_of(v) for v in uniques], dtype=np.int64)
+        codes = np.full(len(local_codes), -1, dtype=np.int64)
+        found = local_codes >= 0
+        codes[found] = mapping[local_codes[found]]
+        return pd.Categorical.from_codes(codes, categories=self.categories)
+
+    def codes_for(self, series):
+        """Kode kamus untuk sebuah kolom (-1 untuk kosong), tanpa encode ulang bila sudah ringkas."""
+        if self.owns(series):
+            return np.asarray(series.cat.codes)
+        return np.asarray(self.encode(series).codes)
+
+    def owns(self, series):
+        """True jika kolom sudah Categorical dengan kategori dari kamus ini."""
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            return False
+        categories = series.cat.categories
+        return len(categories) <= len(self._values) and categories.equals(self.categories[:len(categories)])
+
+    def from_codes(self, codes):
+        return pd.Categorical.from_codes(codes, categories=self.categories)
+
+    def encode_frame(self, df, columns):
+        """Salinan `df` dengan `columns` diubah menjadi Categorical kamus."""
+        encoded = {col: self.encode(df[col]) for col in columns}
+        df = df.copy(deep=False)
+        for col, values in encoded.items():
+            df[col] = pd.Series(values, index=df.index)
+        return df
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from crfill.engine import DayColumnIndex, fill_roster
+from crfill.vocab import DutyVocabulary
+
+DATES = [1, 2, 3, 4, 5]
+
+
+def fill_iterrows(template_df, dates, input_df):
+    # Algoritma lama (sebelum engine vektor): cocokkan Crew ID per baris, ambil baris input pertama
+    details = {}
+    for date in dates:
+        matched = not_matched = empty = 0
+        template_df[date] = template_df[date].astype(object)
+        for index, row in template_df.iterrows():
+            crew_id = str(row["Crew ID"]).strip()
+            match = input_df[input_df["Crew ID"].astype(str).str.strip() == crew_id]
+            if not match.empty:
+                val = match[date].iloc[0] if date in input_df.columns else None
+                if pd.notna(val):
+                    template_df.at[index, date] = val
+                    matched += 1
+                else:
+                    template_df.at[index, date] = "-"
+                    empty += 1
+            else:
+                template_df.at[index, date] = "-"
+                not_matched += 1
+        details[date] = {'matched': matched, 'not_matched': not_matched, 'empty': empty}
+    return details
+
+
+def make_frames(seed, duplicates):
+    rng = np.random.default_rng(seed)
+    template_ids = [f"{n}" for n in rng.choice(np.arange(1000, 2000), size=120, replace=False)]
+    # Sebagian crew template tidak ada di input, ditambah crew input yang tidak ada di template
+    input_ids = [f" {crew_id} " for crew_id in template_ids[:100]] + [str(n) for n in range(3000, 3020)]
+    if duplicates:
+        input_ids += list(rng.choice(input_ids[:100], size=15))
+    duties = np.array(["OFF", "SBY", "GA123", "CUTI", None], dtype=object)
+    input_df = pd.DataFrame({"Crew ID": input_ids})
+    for date in DATES:
+        input_df[date] = rng.choice(duties, size=len(input_ids))
+    template_df = pd.DataFrame({"No": range(1, len(template_ids) + 1), "Crew ID": template_ids})
+    for date in DATES:
+        template_df[date] = None
+    return template_df, input_df
+
+
+@pytest.mark.parametrize("duplicates", [False, True])
+@pytest.mark.parametrize("use_vocabulary", [False, True])
+def test_fill_roster_matches_iterrows(duplicates, use_vocabulary):
+    template_df, input_df = make_frames(seed=7, duplicates=duplicates)
+    expected_df = template_df.copy()
+    expected = fill_iterrows(expected_df, DATES, input_df)
+
+    result_df = template_df.copy()
+    vocabulary = DutyVocabulary() if use_vocabulary else None
+    stats = fill_roster(result_df, DATES, (input_df, "input.xlsx"), day_index=DayColumnIndex(result_df.columns),
+                        vocabulary=vocabulary)
+
+    for date in DATES:
+        details = stats['date_details'][date]
+        assert {key: details[key] for key in expected[date]} == expected[date]
+        assert result_df[date].astype(object).tolist() == expected_df[date].tolist()
+    assert stats['total_matched'] == sum(d['matched'] for d in expected.values())
+    assert stats['total_not_matched'] == sum(d['not_matched'] for d in expected.values())
+    assert stats['total_empty'] == sum(d['empty'] for d in expected.values())